@@ -1,4 +1,13 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+import json
+import operator
+import os
+import random
+import threading
+import time
+import weakref
 
 # Observer Interface
 class Observer(ABC):
@@ -6,24 +15,233 @@ class Observer(ABC):
     def update(self, message: str):
         pass
 
-# Subject
-class YouTubeChannel:
+# Subject base holding observers through weak references in an insertion-
+# ordered dict keyed by id(): O(1) add/remove, and garbage-collected observers
+# drop out without an explicit remove. Notification iterates a snapshot, so
+# observers may subscribe or unsubscribe while being notified.
+class WeakSubject:
     def __init__(self):
-        self.subscribers = []
+        self._refs = {}
+        # Refs whose observer died; the GC callback only queues them and they
+        # are removed outside any iteration
+        self._dead = []
+
+    def _purge(self):
+        while self._dead:
+            ref = self._dead.pop()
+            if self._refs.get(ref.key) is ref:
+                del self._refs[ref.key]
+                self._forget(ref.key)
+
+    def _forget(self, key):
+        pass
+
+    def add_observer(self, observer: Observer):
+        self._purge()
+        key = id(observer)
+        if key not in self._refs:
+            self._refs[key] = weakref.KeyedRef(observer, self._dead.append, key)
+
+    def remove_observer(self, observer: Observer):
+        self._purge()
+        ref = self._refs.get(id(observer))
+        if ref is None or ref() is not observer:
+            raise ValueError("observer is not subscribed")
+        del self._refs[id(observer)]
+        self._forget(id(observer))
+
+    @property
+    def observers(self):
+        self._purge()
+        return [observer for observer in [ref() for ref in list(self._refs.values())] if observer is not None]
+
+# Subject
+class YouTubeChannel(WeakSubject):
+    def __init__(self, fanout=None):
+        super().__init__()
+        # Optional FanOutEngine; uploads then return as soon as the job is queued
+        self.fanout = fanout
 
     def subscribe(self, observer: Observer):
-        self.subscribers.append(observer)
+        self.add_observer(observer)
 
     def unsubscribe(self, observer: Observer):
-        self.subscribers.remove(observer)
+        self.remove_observer(observer)
+
+    @property
+    def subscribers(self):
+        return self.observers
 
     def notify_all(self, message: str):
-        for subscriber in self.subscribers:
+        if self.fanout is not None:
+            self._purge()
+            return self.fanout.publish(message, list(self._refs.values()))
+        for subscriber in self.observers:
             subscriber.update(message)
 
     def upload_video(self, video_title: str):
         print(f"\n🎥 New video uploaded: {video_title}")
-        self.notify_all(f"New video: {video_title}")
+        return self.notify_all(f"New video: {video_title}")
+
+class FanOutJob:
+    def __init__(self, job_id: int, message: str, offsets=None):
+        self.job_id = job_id
+        self.message = message
+        self.offsets = offsets  # per shard: subscribers delivered so far
+        self.delivered = 0
+        self.failed = 0
+        self.done = threading.Event()
+
+    def wait(self, timeout=None) -> bool:
+        return self.done.wait(timeout)
+
+# Delivers one message to a large subscriber snapshot off the uploader's
+# thread. publish() records the job and returns; a pool task then resolves
+# the subject's weak references, writes the snapshot's subscriber keys to
+# disk and splits it into shards (shard i holds every shards-th key). Each
+# shard is delivered by a pool worker in batches, and a failing subscriber
+# is retried with exponential backoff before it is counted as failed.
+#
+# After every batch the shard offsets are written to the progress file, so
+# a fan-out interrupted by a crash resumes from the last completed batch of
+# each shard, against the saved snapshot: subscribers that left since are
+# skipped, and ones that joined since are not included. key(subscriber) is
+# therefore required: a JSON-serialisable id that names the same subscriber
+# in a new process (id() does not, and is rejected). A crash before the snapshot is written resumes from a
+# fresh snapshot, since nothing has been delivered yet.
+class FanOutEngine:
+    def __init__(self, progress_path, key, shards=16, workers=4, batch_size=1000, max_retries=3, backoff=0.01):
+        if key is id:
+            raise ValueError("key must identify subscribers across processes; id() does not")
+        self.progress_path = progress_path
+        self.shards = shards
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.key = key
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._ids = count(max(map(int, self._load()), default=-1) + 1)
+
+    def _load(self):
+        if not os.path.exists(self.progress_path):
+            return {}
+        with open(self.progress_path) as fh:
+            return json.load(fh)
+
+    @staticmethod
+    def _write_json(path, data):
+        # Replace atomically and durably so a crash mid-write leaves the
+        # previous version intact
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump(data, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+
+    def _snapshot_path(self, job_id):
+        return f"{self.progress_path}.{job_id}.keys"
+
+    def _save(self):
+        # Called with the lock held
+        state = {str(job.job_id): {"message": job.message, "offsets": job.offsets}
+                 for job in self.jobs.values() if not job.done.is_set()}
+        self._write_json(self.progress_path, state)
+
+    def publish(self, message: str, refs) -> FanOutJob:
+        # Returns as soon as the job is recorded; delivery runs in the pool
+        job = FanOutJob(next(self._ids), message)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            self._save()
+        self.pool.submit(self._prepare, job, (ref() for ref in refs))
+        return job
+
+    def resume(self, subscribers):
+        # Restart every job left unfinished in the progress file, given the
+        # current subscribers (e.g. a channel rebuilt after a restart)
+        subscribers = list(subscribers)
+        by_key = {self.key(subscriber): subscriber for subscriber in subscribers}
+        resumed = []
+        for job_id, entry in self._load().items():
+            if int(job_id) in self.jobs:
+                continue
+            job = FanOutJob(int(job_id), entry["message"], entry["offsets"])
+            self.jobs[job.job_id] = job
+            if job.offsets is None:
+                self.pool.submit(self._prepare, job, subscribers)
+            else:
+                with open(self._snapshot_path(job.job_id)) as fh:
+                    keys = json.load(fh)
+                self._start(job, [by_key.get(key) for key in keys])
+            resumed.append(job)
+        return resumed
+
+    def _prepare(self, job: FanOutJob, subscribers):
+        members = [subscriber for subscriber in subscribers if subscriber is not None]
+        self._write_json(self._snapshot_path(job.job_id), [self.key(subscriber) for subscriber in members])
+        with self._lock:
+            job.offsets = [0] * self.shards
+            self._save()
+        self._start(job, members)
+
+    def _start(self, job: FanOutJob, members):
+        job.pending = len(job.offsets)
+        for shard in range(len(job.offsets)):
+            self.pool.submit(self._deliver_shard, job, members, shard)
+
+    def _deliver_shard(self, job: FanOutJob, members, shard: int):
+        members = members[shard::len(job.offsets)]
+        offset = job.offsets[shard]
+        while offset < len(members) and not self._stopping.is_set():
+            batch = members[offset:offset + self.batch_size]
+            delivered, failed = self._deliver_batch(job.message, batch)
+            offset += len(batch)
+            with self._lock:
+                job.offsets[shard] = offset
+                job.delivered += delivered
+                job.failed += failed
+                self._save()
+        with self._lock:
+            job.pending -= 1
+            if job.pending == 0 and not self._stopping.is_set():
+                job.done.set()
+                self._save()
+                os.remove(self._snapshot_path(job.job_id))
+
+    def _deliver_batch(self, message: str, members):
+        # Subscribers gone since the snapshot (None) count as delivered
+        batch = [subscriber for subscriber in members if subscriber is not None]
+        retry = []
+        for subscriber in batch:
+            try:
+                subscriber.update(message)
+            except Exception:
+                retry.append(subscriber)
+        delivered = len(batch) - len(retry)
+        for attempt in range(self.max_retries):
+            if not retry:
+                break
+            time.sleep(self.backoff * 2 ** attempt)
+            still_failing = []
+            for subscriber in retry:
+                try:
+                    subscriber.update(message)
+                except Exception:
+                    still_failing.append(subscriber)
+            delivered += len(retry) - len(still_failing)
+            retry = still_failing
+        return delivered + len(members) - len(batch), len(retry)
+
+    def shutdown(self, wait=True):
+        # Simulates a crash when wait is False: in-flight shards stop after
+        # their current batch and progress stays in the file
+        if not wait:
+            self._stopping.set()
+        self.pool.shutdown(wait=True)
 
 # Concrete Observers
 class SubscriberA(Observer):
@@ -34,6 +252,120 @@ class SubscriberB(Observer):
     def update(self, message: str):
         print(f"Subscriber B received: {message}")
 
+class ListChannel:
+    # The original list-based subscriber store, kept for comparison
+    def __init__(self):
+        self.subscribers = []
+
+    def subscribe(self, observer):
+        self.subscribers.append(observer)
+
+    def unsubscribe(self, observer):
+        self.subscribers.remove(observer)
+
+
+def benchmark_registry(n=100_000, removals=5_000):
+    class Silent(Observer):
+        def update(self, message: str):
+            pass
+
+    subscribers = [Silent() for _ in range(n)]
+    leaving = random.Random(0).sample(subscribers, removals)
+    for label, channel in (("list", ListChannel()), ("weak dict", YouTubeChannel())):
+        start = time.perf_counter()
+        for s in subscribers:
+            channel.subscribe(s)
+        added = time.perf_counter() - start
+        start = time.perf_counter()
+        for s in leaving:
+            channel.unsubscribe(s)
+        removed = time.perf_counter() - start
+        print(f"{label:>9}: subscribe {added / n * 1e6:.2f} us each | unsubscribe {removed / removals * 1e6:.2f} us each")
+
+    # Dropped subscribers disappear without unsubscribe()
+    channel = YouTubeChannel()
+    for s in subscribers:
+        channel.subscribe(s)
+    del subscribers[: n // 2], leaving
+    print(f"Subscribers after dropping half the references: {len(channel.subscribers)}")
+
+
+def benchmark_fanout(n=200_000, shards=16, workers=4):
+    import shutil
+    import tempfile
+
+    class Inbox(Observer):
+        def __init__(self, subscriber_id):
+            self.subscriber_id = subscriber_id
+            self.received = 0
+
+        def update(self, message: str):
+            self.received += 1
+
+    class Flaky(Inbox):
+        # Fails the first delivery attempt of every message
+        def __init__(self, subscriber_id):
+            super().__init__(subscriber_id)
+            self.attempts = 0
+
+        def update(self, message: str):
+            self.attempts += 1
+            if self.attempts % 2:
+                raise ConnectionError("transient")
+            self.received += 1
+
+    subscribers = [Flaky(i) if i % 1000 == 0 else Inbox(i) for i in range(n)]
+    key = operator.attrgetter("subscriber_id")
+    plain = YouTubeChannel()
+    for s in subscribers:
+        plain.subscribe(s)
+    start = time.perf_counter()
+    for s in plain.observers:
+        try:
+            s.update("sync")
+        except ConnectionError:
+            pass
+    sync = time.perf_counter() - start
+
+    progress_path = os.path.join(tempfile.mkdtemp(), "fanout.json")
+    engine = FanOutEngine(progress_path, key, shards=shards, workers=workers)
+    channel = YouTubeChannel(fanout=engine)
+    for s in subscribers:
+        channel.subscribe(s)
+        s.received = 0
+    start = time.perf_counter()
+    job = channel.notify_all("New video: sharded")
+    ack = time.perf_counter() - start
+    # Crash part way through, then resume with a fresh engine
+    while job.delivered < n // 3:
+        time.sleep(0.001)
+    engine.shutdown(wait=False)
+    before_crash = sum(s.received for s in subscribers)
+
+    # The restarted process rebuilds its registry in a different order, some
+    # subscribers have left and one has joined
+    rng = random.Random(1)
+    left = set(map(key, rng.sample(subscribers, 1000)))
+    rebuilt = [s for s in subscribers if key(s) not in left] + [Inbox(n)]
+    rng.shuffle(rebuilt)
+    engine = FanOutEngine(progress_path, key, shards=shards, workers=workers)
+    channel = YouTubeChannel(fanout=engine)
+    for s in rebuilt:
+        channel.subscribe(s)
+    resumed, = engine.resume(channel.observers)
+    resumed.wait()
+    elapsed = time.perf_counter() - start
+    engine.shutdown()
+
+    shutil.rmtree(os.path.dirname(progress_path))
+
+    redelivered = sum(max(s.received - 1, 0) for s in subscribers)
+    missing = sum(1 for s in subscribers if s.received == 0 and key(s) not in left)
+    print(f"Fan-out to {n:,}: sync notify_all {sync * 1e3:.0f} ms | sharded ack {ack * 1e3:.2f} ms, "
+          f"done in {elapsed * 1e3:.0f} ms | crashed after {before_crash:,}, resumed, "
+          f"{redelivered:,} redelivered, {missing} missed, {job.failed + resumed.failed} failed")
+
+
 # Example usage
 channel = YouTubeChannel()
 
@@ -45,4 +377,9 @@ channel.subscribe(b)
 
 channel.upload_video("Design Patterns in Python")
 channel.unsubscribe(b)
-channel.upload_video("Trying after unsubscribe")
\ No newline at end of file
+channel.upload_video("Trying after unsubscribe")
+
+if __name__ == "__main__":
+    print()
+    benchmark_registry()
+    benchmark_fanout()
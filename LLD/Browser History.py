@@ -14,16 +14,205 @@
 # - How to manage the current position.
 # - Which data structures to use for efficient navigation.
 
+import heapq
+import math
+import random
+import re
+import time
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal", "bucket", "top")
+
+    def __init__(self):
+        self.children = None
+        self.terminal = None  # internal node: url ids whose key ends here
+        self.bucket = []      # leaf: (key, url id) pairs, None once burst
+        self.top = None       # internal node: best url ids in the subtree
+
+
+# Address-bar index over visited URLs and title words, ranked by frecency.
+#
+# Frecency is the sum over visits of 2 ** (visit time / half life), kept in
+# log2 form. Every score decays at the same rate, so this ranks the same as
+# a decayed visit count, but a score only changes when its URL is visited.
+# That lets each trie node cache the top URLs of its subtree: when a score
+# rises, only the nodes on that URL's key paths need updating.
+#
+# The trie is a burst trie. Keys sit in small leaf buckets, and a bucket
+# splits into children only when it overflows. The node count stays a
+# fraction of the key count. A prefix ending at an internal node is answered
+# from its cache. One ending inside a bucket scans at most BUCKET keys.
+class VisitIndex:
+    BUCKET = 32
+    CACHE_K = 10
+    HALF_LIFE = 30 * 24 * 3600
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.root = _TrieNode()
+        self._burst(self.root, 0)
+        self.ids = {}      # url -> id
+        self.urls = []
+        self.titles = []
+        self.visits = []   # per id visit count
+        self.last_visit = []
+        self.scores = []   # log2 frecency
+        self.keys = []     # per id set of indexed keys
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = text.lower()
+        for prefix in ("https://", "http://", "www."):
+            if text.startswith(prefix):
+                text = text[len(prefix):]
+        return text
+
+    def visit(self, url: str, title: str = None):
+        now = self.clock()
+        uid = self.ids.get(url)
+        if uid is None:
+            uid = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+            self.titles.append(title)
+            self.visits.append(0)
+            self.last_visit.append(now)
+            self.scores.append(-math.inf)
+            self.keys.append(set())
+        elif title:
+            self.titles[uid] = title
+        self.visits[uid] += 1
+        self.last_visit[uid] = now
+
+        weight = now / self.HALF_LIFE
+        score = self.scores[uid]
+        high, low = max(score, weight), min(score, weight)
+        self.scores[uid] = high + math.log2(1 + 2 ** (low - high))
+
+        keys = {self.normalize(url)}
+        if self.titles[uid]:
+            keys.update(re.findall(r"[a-z0-9]+", self.titles[uid].lower()))
+        indexed = self.keys[uid]
+        # Words of a replaced title no longer match
+        for key in indexed - keys:
+            self._unindex(key, uid, keys)
+        for key in keys:
+            self._index(key, uid, key not in indexed)
+        self.keys[uid] = keys
+
+    def _index(self, key: str, uid: int, insert: bool):
+        # Walks the internal nodes on key's path, offering uid to each cache,
+        # and for a new key stores it where the path ends
+        node, depth = self.root, 0
+        while node.bucket is None:
+            self._offer(node.top, uid)
+            if depth == len(key):
+                if insert:
+                    node.terminal.append(uid)
+                return
+            child = node.children.get(key[depth])
+            if child is None:
+                if not insert:
+                    return
+                child = node.children[key[depth]] = _TrieNode()
+            node, depth = child, depth + 1
+        if insert:
+            node.bucket.append((key, uid))
+            if len(node.bucket) > self.BUCKET:
+                self._burst(node, depth)
+
+    def _unindex(self, key: str, uid: int, remaining):
+        # Drops key's entry for uid. A cache on the path that lists uid is
+        # rebuilt once none of uid's remaining keys fall under that node.
+        node, depth, path = self.root, 0, []
+        while node.bucket is None:
+            path.append((node, depth))
+            if depth == len(key):
+                node.terminal.remove(uid)
+                break
+            node, depth = node.children[key[depth]], depth + 1
+        else:
+            node.bucket.remove((key, uid))
+        for node, depth in path:
+            if uid in node.top and not any(k.startswith(key[:depth]) for k in remaining):
+                node.top = heapq.nlargest(self.CACHE_K, self._subtree_ids(node), key=self.scores.__getitem__)
+
+    def _burst(self, node: _TrieNode, depth: int):
+        entries, node.bucket = node.bucket, None
+        node.children, node.terminal, node.top = {}, [], []
+        for key, uid in entries:
+            target, d = node, depth
+            while target.bucket is None:
+                self._offer(target.top, uid)
+                if d == len(key):
+                    target.terminal.append(uid)
+                    break
+                child = target.children.get(key[d])
+                if child is None:
+                    child = target.children[key[d]] = _TrieNode()
+                target, d = child, d + 1
+            else:
+                target.bucket.append((key, uid))
+                if len(target.bucket) > self.BUCKET:
+                    self._burst(target, d)
+
+    def _offer(self, top: list, uid: int):
+        scores = self.scores
+        if uid in top:
+            pass
+        elif len(top) < self.CACHE_K:
+            top.append(uid)
+        elif scores[uid] > scores[top[-1]]:
+            top[-1] = uid
+        else:
+            return
+        top.sort(key=scores.__getitem__, reverse=True)
+
+    def suggest(self, prefix: str, k: int = 8):
+        # Top k (url, title) pairs whose URL or a title word starts with prefix
+        prefix = self.normalize(prefix)
+        node, depth = self.root, 0
+        while node.bucket is None and depth < len(prefix):
+            node = node.children.get(prefix[depth])
+            if node is None:
+                return []
+            depth += 1
+
+        if node.bucket is None:
+            if k <= self.CACHE_K:
+                ids = node.top[:k]
+            else:
+                ids = heapq.nlargest(k, self._subtree_ids(node), key=self.scores.__getitem__)
+        else:
+            matches = {uid for key, uid in node.bucket if key.startswith(prefix)}
+            ids = heapq.nlargest(k, matches, key=self.scores.__getitem__)
+        return [(self.urls[uid], self.titles[uid]) for uid in ids]
+
+    def _subtree_ids(self, node: _TrieNode):
+        ids, stack = set(), [node]
+        while stack:
+            node = stack.pop()
+            if node.bucket is not None:
+                ids.update(uid for _, uid in node.bucket)
+            else:
+                ids.update(node.terminal)
+                stack.extend(node.children.values())
+        return ids
+
+
 class BrowserHistory:
-    def __init__(self, url) -> None:
+    def __init__(self, url, index: VisitIndex = None) -> None:
         self.current = url
         self.prev = []
         self.forward = []
+        self.index = index or VisitIndex()
+        self.index.visit(url)
 
-    def visit(self, url):
+    def visit(self, url, title=None):
         self.prev.append(self.current)
         self.current = url
         self.forward.clear()
+        self.index.visit(url, title)
 
     def back(self):
         if not self.prev:
@@ -41,9 +230,68 @@ class BrowserHistory:
         
     def get_current_page(self):
         return self.current
+
+    def suggest(self, prefix, k=8):
+        return self.index.suggest(prefix, k)
     
 
+
+def benchmark_omnibox(urls=200_000, visits=400_000, queries=2_000, k=8):
+    rng = random.Random(8)
+    words = ["python", "docs", "news", "github", "issue", "search", "video", "api", "blog", "shop",
+             "weather", "maps", "music", "login", "cart", "review", "guide", "release", "forum", "wiki"]
+    hosts = [f"{rng.choice(words)}{rng.choice(words)}{i}.{rng.choice(['com', 'org', 'io'])}" for i in range(urls // 20)]
+    pages = [(f"https://{rng.choice(hosts)}/{rng.choice(words)}/{i}",
+              " ".join(rng.choices(words, k=4)).title()) for i in range(urls)]
+
+    clock = [1_700_000_000.0]
+    index = VisitIndex(clock=lambda: clock[0])
+    start = time.perf_counter()
+    for rank in range(visits):
+        clock[0] += 5
+        # Zipf-ish revisits on top of one visit per page
+        url, title = pages[rank] if rank < urls else pages[int(urls * rng.random() ** 3)]
+        index.visit(url, title)
+    build = time.perf_counter() - start
+
+    prefixes = []
+    for _ in range(queries):
+        url, title = rng.choice(pages)
+        text = rng.choice((VisitIndex.normalize(url), rng.choice(title.lower().split())))
+        prefixes.append(text[:rng.randint(1, 8)])
+
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        index.suggest(prefix, k)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+
+    def scan(prefix):
+        prefix = VisitIndex.normalize(prefix)
+        matches = [uid for uid, url in enumerate(index.urls)
+                   if VisitIndex.normalize(url).startswith(prefix)
+                   or any(w.startswith(prefix) for w in re.findall(r"[a-z0-9]+", (index.titles[uid] or "").lower()))]
+        return heapq.nlargest(k, matches, key=index.scores.__getitem__)
+
+    for prefix in prefixes[:5]:
+        assert [index.urls[uid] for uid in scan(prefix)] == [url for url, _ in index.suggest(prefix, k)]
+    start = time.perf_counter()
+    scan(prefixes[0])
+    naive = time.perf_counter() - start
+
+    print(f"Omnibox over {urls:,} URLs ({visits:,} visits indexed in {build:.1f}s): "
+          f"top-{k} p50 {samples[len(samples) // 2] * 1e6:.0f} us, p99 {samples[int(len(samples) * 0.99)] * 1e6:.0f} us | "
+          f"full scan {naive * 1e3:.0f} ms per query")
+
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Browser history demo")
+    parser.add_argument("--benchmark", action="store_true", help="also time omnibox queries over a large history")
+    args = parser.parse_args()
+
     bh = BrowserHistory("google.com")
     print(bh.get_current_page())  # google.com
 
@@ -58,3 +306,15 @@ if __name__ == "__main__":
     bh.visit("openai.com")
     print(bh.forward_page())      # No forward page
     print(bh.get_current_page())  # openai.com
+
+    bh.visit("https://github.com/python/cpython", "CPython source")
+    bh.visit("https://docs.python.org/3/", "Python documentation")
+    bh.visit("https://github.com/python/cpython", "CPython source")
+    print(bh.suggest("git"))      # cpython first: visited twice
+    print(bh.suggest("py"))       # title words match too
+
+    bh.visit("https://docs.python.org/3/", "Welcome to the docs")
+    print(bh.suggest("documentation"))  # [] - no longer in the title
+
+    if args.benchmark:
+        benchmark_omnibox()
@@ -0,0 +1,230 @@
+# Benchmark suite for "Unix File Search API.py" and "File System Search API.py".
+#
+# Generates a seeded synthetic file tree (depth, fan-out, extension mix and
+# size distribution are configurable), runs a standard mix of queries
+# against both APIs and reports latency percentiles, throughput and peak
+# memory.
+#
+# Run: python "LLD/File Search Benchmark.py" --files 200000 --depth 4 --fan-out 8
+#      python "LLD/File Search Benchmark.py" --extensions txt=50,log=30,pdf=20 --size-sigma 1.5
+
+import argparse
+import gc
+import importlib.util
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_module(alias, file_name):
+    # The modules have spaces in their file names; load them by path and
+    # register them so multiprocessing can pickle their functions
+    spec = importlib.util.spec_from_file_location(alias, os.path.join(HERE, file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+unix = load_module("unix_file_search", "Unix File Search API.py")
+fs = load_module("file_system_search", "File System Search API.py")
+
+
+class TreeConfig:
+    def __init__(self, files=200_000, depth=4, fan_out=8, seed=42,
+                 extensions=None, size_median_kb=64, size_sigma=2.0):
+        self.files = files
+        self.depth = depth
+        self.fan_out = fan_out
+        self.seed = seed
+        # extension -> relative weight
+        self.extensions = extensions or {"txt": 20, "log": 15, "py": 15, "pdf": 10, "jpg": 20, "csv": 10, "md": 10}
+        self.size_median_kb = size_median_kb
+        self.size_sigma = size_sigma
+
+
+class TreeGenerator:
+    WORDS = ["report", "invoice", "draft", "final", "notes", "summary", "backup", "photo", "data", "main"]
+
+    def __init__(self, config: TreeConfig):
+        self.config = config
+
+    def directories(self):
+        # Every directory path down to config.depth, breadth first
+        paths = [""]
+        level = [""]
+        for _ in range(self.config.depth):
+            level = [f"{parent}/d{i}" for parent in level for i in range(self.config.fan_out)]
+            paths.extend(level)
+        return paths
+
+    def records(self):
+        # (directory, name, extension, size) tuples, identical for a given seed
+        config = self.config
+        rng = random.Random(config.seed)
+        directories = self.directories()
+        extensions = list(config.extensions)
+        weights = list(config.extensions.values())
+        mu = math.log(config.size_median_kb)
+        records = []
+        for i in range(config.files):
+            records.append((
+                rng.choice(directories),
+                f"{rng.choice(self.WORDS)}_{rng.choice(self.WORDS)}_{2000 + i % 31}",
+                rng.choices(extensions, weights)[0],
+                max(1, int(rng.lognormvariate(mu, config.size_sigma))),
+            ))
+        return records
+
+    def unix_catalog(self, records):
+        return [unix.File(name, extension, size, directory or "/") for directory, name, extension, size in records]
+
+    def file_system_tree(self, records):
+        root = fs.FileSystem("/", True)
+        nodes = {"": root}
+        for path in self.directories()[1:]:
+            parent, _, name = path.rpartition("/")
+            node = fs.FileSystem(name, True)
+            nodes[parent].subDirectories.append(node)
+            nodes[path] = node
+        for directory, name, extension, size in records:
+            nodes[directory].files.append(fs.File(name, extension, size))
+        return root
+
+
+def unix_queries():
+    U = unix
+    return {
+        "extension": U.ExtensionSpecification("log"),
+        "exact name": U.NameSpecification("report_final_2010"),
+        "and": U.AndSpecification(U.ExtensionSpecification("pdf"), U.SizeSpecification(64)),
+        "or": U.OrSpecification(U.ExtensionSpecification("md"), U.ExtensionSpecification("csv")),
+        "glob": U.GlobNameSpecification("*report*2024*.pdf"),
+        "substring": U.SubstringNameSpecification("backup_photo"),
+    }
+
+
+def file_system_queries():
+    F = fs
+    return {
+        "extension": [F.ExtensionFilter("log")],
+        "exact name": [F.NameFilter("report_final_2010")],
+        "size range": [F.SizeFilter(1024, ">="), F.SizeFilter(4096, "<")],
+        "and": [F.ExtensionFilter("pdf"), F.SizeFilter(256, ">")],
+        "nested": [F.OrFilter(F.AndFilter(F.ExtensionFilter("txt"), F.SizeFilter(10, "<")),
+                              F.NameFilter("main_data_2001"))],
+    }
+
+
+def percentile(sorted_samples, q):
+    index = min(len(sorted_samples) - 1, int(round(q / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def measure(run, repeat, n_files=None):
+    # n_files is how many files one run examines; leave it out for runs that
+    # stop early or skip files via an index, which have no honest files/s
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    return {
+        "p50": percentile(samples, 50) * 1000,
+        "p95": percentile(samples, 95) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+        "qps": repeat / total,
+        "files/s": repeat * n_files / total if n_files is not None else None,
+        "peak MB": peak / 1e6,
+    }
+
+
+def report(title, rows):
+    print(f"\n{title}")
+    print(f"{'query':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'qps':>10}{'Mfiles/s':>10}{'peak MB':>10}")
+    for name, m in rows:
+        throughput = f"{m['files/s'] / 1e6:>10.2f}" if m["files/s"] is not None else f"{'-':>10}"
+        print(f"{name:<28}{m['p50']:>10.2f}{m['p95']:>10.2f}{m['p99']:>10.2f}"
+              f"{m['qps']:>10.1f}{throughput}{m['peak MB']:>10.2f}")
+
+
+def run_suite(config: TreeConfig, repeat=20, workers=None):
+    generator = TreeGenerator(config)
+    start = time.perf_counter()
+    records = generator.records()
+    catalog = generator.unix_catalog(records)
+    tree = generator.file_system_tree(records)
+    print(f"Generated {config.files} files in {len(generator.directories())} directories "
+          f"(depth {config.depth}, fan-out {config.fan_out}, seed {config.seed}) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    plain = unix.FileSearch(catalog)
+    indexed = unix.FileSearch(catalog, index_names=True)
+    snapshot = unix.ColumnarSnapshot(catalog)
+    rows = []
+    for name, spec in unix_queries().items():
+        rows.append((f"{name}", measure(lambda: plain.filter(spec), repeat, config.files)))
+        if hasattr(spec, "required_trigrams"):
+            rows.append((f"{name} [trigram]", measure(lambda: indexed.filter(spec), repeat)))
+        else:
+            rows.append((f"{name} [columnar]", measure(lambda: snapshot.filter(spec), repeat, config.files)))
+    report("Unix File Search API (FileSearch)", rows)
+
+    rows = []
+    for name, filters in file_system_queries().items():
+        search = fs.Search(tree, filters)
+        rows.append((f"{name}", measure(search.find_files, repeat, config.files)))
+        rows.append((f"{name} [first 50]", measure(lambda: list(search.iter_files(limit=50)), repeat)))
+        if workers:
+            parallel = fs.ParallelSearch(tree, filters, workers=workers)
+            rows.append((f"{name} [{workers} procs]", measure(parallel.find_paths, max(3, repeat // 5), config.files)))
+    report("File System Search API (Search)", rows)
+
+
+def extension_weights(text):
+    # "txt=20,log=15,py" -> {"txt": 20.0, "log": 15.0, "py": 1.0}
+    weights = {}
+    for item in text.split(","):
+        extension, _, weight = item.strip().partition("=")
+        if not extension:
+            raise argparse.ArgumentTypeError(f"empty extension in {text!r}")
+        try:
+            weights[extension] = float(weight) if weight else 1.0
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad weight for {extension!r}: {weight!r}") from None
+        if weights[extension] <= 0:
+            raise argparse.ArgumentTypeError(f"weight for {extension!r} must be positive")
+    return weights
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark both file search APIs on a synthetic tree")
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fan-out", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--size-median-kb", type=int, default=64)
+    parser.add_argument("--size-sigma", type=float, default=2.0, help="spread of the log-normal size distribution")
+    parser.add_argument("--extensions", type=extension_weights, default=None,
+                        help="extension mix as ext=weight pairs, e.g. txt=20,log=15,py=15")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=0, help="also run ParallelSearch with this many processes")
+    args = parser.parse_args()
+
+    config = TreeConfig(args.files, args.depth, args.fan_out, args.seed, extensions=args.extensions,
+                        size_median_kb=args.size_median_kb, size_sigma=args.size_sigma)
+    run_suite(config, repeat=args.repeat, workers=args.workers)
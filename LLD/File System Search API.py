@@ -10,12 +10,35 @@
 # Traverse all subdirectories recursively to apply the search.
 
 from abc import ABC, abstractmethod
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import fnmatch
+import heapq
+import multiprocessing
+from itertools import count
+import mmap
+import operator
+import os
+import random
+import struct
+import tempfile
+import time
 
 class File:
-    def __init__(self,name,extension,size) -> None:
+    # No per-instance __dict__: trees may hold millions of files
+    __slots__ = ("name", "extension", "size", "size_bytes", "mtime")
+
+    def __init__(self,name,extension,size,size_bytes=None,mtime=None) -> None:
         self.name = name
         self.extension = extension
         self.size = size 
+        # Exact st_size / st_mtime_ns for crawled files, used to spot changes
+        self.size_bytes = size_bytes
+        self.mtime = mtime
+
+    @property
+    def full_name(self):
+        return f"{self.name}.{self.extension}" if self.extension else self.name
 
     def __str__(self):
         return f"{self.name}.{self.extension} ({self.size}KB)"
@@ -41,19 +64,92 @@ class ExtensionFilter(Filter):
         return file.extension == self.extension
 
 class SizeFilter(Filter):
+    OPERATORS = {
+        ">": operator.gt,
+        "<": operator.lt,
+        ">=": operator.ge,
+        "<=": operator.le,
+        "==": operator.eq,
+        "!=": operator.ne,
+    }
+
     def __init__(self, size,operator):
+        if operator not in self.OPERATORS:
+            raise ValueError(f"Unsupported size operator: {operator}")
         self.size = size
         self.operator = operator
+        self._compare = self.OPERATORS[operator]
 
     def match(self, file):
-        return eval(f"{file.size} {self.operator} {self.size}")
+        return self._compare(file.size, self.size)
+
+class AndFilter(Filter):
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def match(self, file):
+        return all(f.match(file) for f in self.filters)
+
+class OrFilter(Filter):
+    def __init__(self, *filters):
+        self.filters = filters
+
+    def match(self, file):
+        return any(f.match(file) for f in self.filters)
+
+
+# Turns a filter tree into one generated function so a search pays a single
+# call per file instead of walking Filter objects.
+class FilterCompiler:
+    CONDITIONS = {"AND": " and ", "OR": " or "}
+
+    def compile(self, filters, condition="AND"):
+        condition = condition.upper()
+        if condition not in self.CONDITIONS:
+            raise ValueError(f"Unsupported condition: {condition}")
+        namespace = {}
+        body = self._join(filters, condition, namespace)
+        exec(f"def fused(file):\n    return {body}", namespace)
+        return namespace["fused"]
+
+    def _join(self, filters, condition, namespace):
+        if not filters:
+            return "True" if condition == "AND" else "False"
+        return "(" + self.CONDITIONS[condition].join(self._term(f, namespace) for f in filters) + ")"
+
+    def _term(self, f, namespace):
+        # Exact type checks: subclasses may override match()
+        if type(f) is NameFilter:
+            return f"file.name == {self._constant(f.name, namespace)}"
+        if type(f) is ExtensionFilter:
+            return f"file.extension == {self._constant(f.extension, namespace)}"
+        if type(f) is SizeFilter:
+            # operator is a plain attribute; only paste it if it is still a
+            # known token, never arbitrary text
+            if f.operator not in SizeFilter.OPERATORS:
+                raise ValueError(f"Unsupported size operator: {f.operator}")
+            return f"file.size {f.operator} {self._constant(f.size, namespace)}"
+        if type(f) is AndFilter:
+            return self._join(f.filters, "AND", namespace)
+        if type(f) is OrFilter:
+            return self._join(f.filters, "OR", namespace)
+        # Unknown filter: fall back to calling its match()
+        return f"{self._constant(f.match, namespace)}(file)"
+
+    def _constant(self, value, namespace):
+        key = f"_c{len(namespace)}"
+        namespace[key] = value
+        return key
 
 class FileSystem:
-    def __init__(self,name,isDirectory) -> None:
+    def __init__(self,name,isDirectory,path=None,mtime=None) -> None:
         self.name = name
         self.isDirectory = isDirectory
         self.files = [] 
         self.subDirectories = [] 
+        # Set when the node comes from a real disk crawl
+        self.path = path
+        self.mtime = mtime
 
     def print_structure(self, indent=0):
         prefix = "  " * indent
@@ -66,17 +162,375 @@ class FileSystem:
             sub.print_structure(indent + 1)
 
 
+# Builds a FileSystem tree from a real directory. Each directory is scanned by
+# a bounded thread pool so slow or network filesystems overlap their I/O.
+class DiskCrawler:
+    def __init__(self, max_workers=8, exclude=()):
+        self.max_workers = max_workers
+        self.exclude = list(exclude)
+        self.entries = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @property
+    def entries_per_sec(self):
+        return self.entries / self.elapsed if self.elapsed else 0.0
+
+    def is_excluded(self, name, path):
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(path, p) for p in self.exclude)
+
+    def crawl(self, root_path):
+        root_path = os.path.abspath(root_path)
+        root = FileSystem(os.path.basename(root_path) or root_path, True, root_path, os.stat(root_path).st_mtime_ns)
+        self.entries = self.errors = 0
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {pool.submit(self.scan, root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                # Counters are only updated here, on the calling thread
+                for future in done:
+                    subs, entries, errors = future.result()
+                    self.entries += entries
+                    self.errors += errors
+                    for sub in subs:
+                        pending.add(pool.submit(self.scan, sub))
+
+        self.elapsed = time.perf_counter() - start
+        return root
+
+    def scan(self, directory):
+        # Runs on a worker thread; only touches its own directory node
+        try:
+            with os.scandir(directory.path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return [], 0, 1
+
+        errors = 0
+        for entry in entries:
+            if self.is_excluded(entry.name, entry.path):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                    directory.subDirectories.append(FileSystem(entry.name, True, entry.path, mtime))
+                elif entry.is_file(follow_symlinks=False):
+                    directory.files.append(self.make_file(entry))
+            except OSError:
+                errors += 1
+        return directory.subDirectories, len(directory.files) + len(directory.subDirectories), errors
+
+    @staticmethod
+    def make_file(entry):
+        name, extension = os.path.splitext(entry.name)
+        st = entry.stat(follow_symlinks=False)
+        # Sizes are kept in KB like the rest of the model, rounded up
+        return File(name, extension.lstrip("."), -(-st.st_size // 1024), st.st_size, st.st_mtime_ns)
+
+
+class ChangeSet:
+    def __init__(self):
+        # (directory, file) pairs; modified holds (directory, old_file, new_file)
+        self.added = []
+        self.removed = []
+        self.modified = []
+        # (parent, directory) for each new or deleted subtree root; its files
+        # are also listed in added or removed
+        self.added_directories = []
+        self.removed_directories = []
+
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.modified)
+
+    def __repr__(self):
+        return f"ChangeSet(added={len(self.added)}, removed={len(self.removed)}, modified={len(self.modified)})"
+
+
+# Anything that indexes the tree can listen for refresh change sets
+class IndexListener(ABC):
+    @abstractmethod
+    def apply_changes(self, changes: ChangeSet):
+        pass
+
+
+# Refreshes a crawled tree in place. A directory's mtime only changes when
+# entries are added, removed or renamed in it, so unchanged directories are
+# not re-listed; only their subdirectories are stat'ed. In-place content
+# changes to a file inside an unchanged directory are not detected. A
+# directory that vanishes during the refresh is reported as removed, and
+# listeners always receive the change set for whatever was applied.
+class IncrementalRefresher:
+    def __init__(self, crawler: DiskCrawler, listeners=()):
+        self.crawler = crawler
+        self.listeners = list(listeners)
+        self.rescanned = 0
+        self.errors = 0
+
+    def refresh(self, root: FileSystem):
+        changes = ChangeSet()
+        self.rescanned = self.errors = 0
+        try:
+            stack = [(None, root)]
+            while stack:
+                parent, directory = stack.pop()
+                try:
+                    mtime = os.stat(directory.path).st_mtime_ns
+                except OSError:
+                    self.errors += 1
+                    self.vanished(parent, directory, changes)
+                    continue
+                if mtime != directory.mtime:
+                    directory.mtime = mtime
+                    self.rescan(directory, changes)
+                stack.extend((directory, sub) for sub in directory.subDirectories)
+        finally:
+            # The tree has been changed in place; keep the listeners in step
+            for listener in self.listeners:
+                listener.apply_changes(changes)
+        return changes
+
+    def vanished(self, parent, directory, changes):
+        if parent is not None:
+            parent.subDirectories.remove(directory)
+            self.collect(directory, changes.removed)
+            changes.removed_directories.append((parent, directory))
+            return
+        # The root itself is gone: empty it but keep the node
+        changes.removed.extend((directory, f) for f in directory.files)
+        directory.files = []
+        for sub in directory.subDirectories:
+            self.collect(sub, changes.removed)
+            changes.removed_directories.append((directory, sub))
+        directory.subDirectories = []
+
+    def rescan(self, directory, changes):
+        self.rescanned += 1
+        old_files = {f.full_name: f for f in directory.files}
+        old_subs = {sub.name: sub for sub in directory.subDirectories}
+
+        fresh = FileSystem(directory.name, True, directory.path, directory.mtime)
+        self.crawler.scan(fresh)
+
+        directory.files = []
+        for f in fresh.files:
+            old = old_files.pop(f.full_name, None)
+            if old is None:
+                changes.added.append((directory, f))
+            elif (old.size_bytes, old.mtime) != (f.size_bytes, f.mtime):
+                changes.modified.append((directory, old, f))
+            else:
+                f = old
+            directory.files.append(f)
+        changes.removed.extend((directory, f) for f in old_files.values())
+
+        directory.subDirectories = []
+        for sub in fresh.subDirectories:
+            old = old_subs.pop(sub.name, None)
+            if old is None:
+                # Brand-new subtree: crawl it fully and report every file. A
+                # private crawler leaves the caller's crawl statistics alone
+                try:
+                    sub = DiskCrawler(self.crawler.max_workers, self.crawler.exclude).crawl(sub.path)
+                except OSError:
+                    # Gone again before it could be crawled
+                    self.errors += 1
+                    continue
+                self.collect(sub, changes.added)
+                changes.added_directories.append((directory, sub))
+            directory.subDirectories.append(old or sub)
+        for gone in old_subs.values():
+            self.collect(gone, changes.removed)
+            changes.removed_directories.append((directory, gone))
+
+    @staticmethod
+    def collect(directory, out):
+        stack = [directory]
+        while stack:
+            node = stack.pop()
+            out.extend((node, f) for f in node.files)
+            stack.extend(node.subDirectories)
+
+
+class DirectoryStats:
+    def __init__(self):
+        self.total_size = 0
+        self.file_count = 0
+        self.extension_counts = Counter()
+        # extension (None = any) -> min-heap of (size, seq, file), at most k
+        self.top = {}
+        self.dirty = False
+
+
+# Per-directory subtree aggregates (total size, files per extension and a
+# bounded top-K of the largest files) kept up to date as files come and go,
+# so size questions are answered without walking the tree. Removing a file
+# that may be in a top-K only marks the heaps dirty; they are rebuilt on the
+# next query from the directory's own files and its children's heaps.
+class DirectoryRollups(IndexListener):
+    def __init__(self, root: FileSystem, k=100):
+        self.root = root
+        self.k = k
+        self.stats = {}
+        self.parents = {}
+        self.directories = {}
+        self._seq = count()
+        self.register(root, None)
+
+    def register(self, directory, parent):
+        # Post-order build of one subtree, then fold it into its ancestors
+        order = []
+        stack = [(directory, parent)]
+        while stack:
+            node, node_parent = stack.pop()
+            self.parents[id(node)] = node_parent
+            self.directories[id(node)] = node
+            order.append(node)
+            stack.extend((sub, node) for sub in node.subDirectories)
+
+        for node in reversed(order):
+            stats = DirectoryStats()
+            self.stats[id(node)] = stats
+            for f in node.files:
+                stats.total_size += f.size
+                stats.extension_counts[f.extension] += 1
+            stats.file_count = len(node.files)
+            for sub in node.subDirectories:
+                child = self.stats[id(sub)]
+                stats.total_size += child.total_size
+                stats.file_count += child.file_count
+                stats.extension_counts.update(child.extension_counts)
+            self._rebuild_top(node, stats)
+
+        added = self.stats[id(directory)]
+        for ancestor in self._ancestors(parent):
+            stats = self.stats[id(ancestor)]
+            stats.total_size += added.total_size
+            stats.file_count += added.file_count
+            stats.extension_counts.update(added.extension_counts)
+            if not stats.dirty:
+                for key, heap in added.top.items():
+                    for _, _, f in heap:
+                        self._push(stats.top.setdefault(key, []), f)
+        return order
+
+    def _ancestors(self, directory):
+        while directory is not None:
+            yield directory
+            directory = self.parents[id(directory)]
+
+    def _push(self, heap, f):
+        entry = (f.size, next(self._seq), f)
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def _rebuild_top(self, directory, stats):
+        stats.top = {}
+        for f in directory.files:
+            self._push(stats.top.setdefault(None, []), f)
+            self._push(stats.top.setdefault(f.extension, []), f)
+        for sub in directory.subDirectories:
+            child = self.stats[id(sub)]
+            if child.dirty:
+                self._rebuild_top(sub, child)
+            for key, heap in child.top.items():
+                for _, _, f in heap:
+                    self._push(stats.top.setdefault(key, []), f)
+        stats.dirty = False
+
+    def add_file(self, directory, f):
+        directory.files.append(f)
+        self._added(directory, f)
+
+    def remove_file(self, directory, f):
+        directory.files.remove(f)
+        self._removed(directory, f)
+
+    def _added(self, directory, f):
+        for ancestor in self._ancestors(directory):
+            stats = self.stats[id(ancestor)]
+            stats.total_size += f.size
+            stats.file_count += 1
+            stats.extension_counts[f.extension] += 1
+            if not stats.dirty:
+                self._push(stats.top.setdefault(None, []), f)
+                self._push(stats.top.setdefault(f.extension, []), f)
+
+    def _removed(self, directory, f):
+        for ancestor in self._ancestors(directory):
+            stats = self.stats[id(ancestor)]
+            stats.total_size -= f.size
+            stats.file_count -= 1
+            stats.extension_counts[f.extension] -= 1
+            if not stats.extension_counts[f.extension]:
+                del stats.extension_counts[f.extension]
+            # f may sit in the overall heap, its extension's heap, or both
+            for key in (None, f.extension):
+                heap = stats.top.get(key)
+                if heap and f.size >= heap[0][0]:
+                    stats.dirty = True
+
+    def apply_changes(self, changes: ChangeSet):
+        # The refresher has already updated the tree; only the aggregates move
+        for directory, f in changes.removed:
+            self._removed(directory, f)
+        for directory, old, new in changes.modified:
+            self._removed(directory, old)
+            self._added(directory, new)
+        # New subtrees, empty ones included, are registered whole; that
+        # already counts their files
+        registered = set()
+        for parent, sub in changes.added_directories:
+            registered.update(map(id, self.register(sub, parent)))
+        for directory, f in changes.added:
+            if id(directory) not in registered:
+                self._added(directory, f)
+        for _, gone in changes.removed_directories:
+            self._unregister(gone)
+
+    def _unregister(self, directory):
+        # Drops a deleted subtree once its files have been subtracted
+        stack = [directory]
+        while stack:
+            node = stack.pop()
+            self.stats.pop(id(node), None)
+            self.parents.pop(id(node), None)
+            self.directories.pop(id(node), None)
+            stack.extend(node.subDirectories)
+
+    def total_size(self, directory=None):
+        return self.stats[id(directory or self.root)].total_size
+
+    def extension_counts(self, directory=None):
+        return dict(self.stats[id(directory or self.root)].extension_counts)
+
+    def largest_files(self, k=10, extension=None, directory=None):
+        if k > self.k:
+            raise ValueError(f"Only the top {self.k} files are tracked")
+        directory = directory or self.root
+        stats = self.stats[id(directory)]
+        if stats.dirty:
+            self._rebuild_top(directory, stats)
+        return [f for _, _, f in heapq.nlargest(k, stats.top.get(extension, []))]
+
+    def largest_directories(self, k=10):
+        # [(directory, total size)] for the k biggest subtrees
+        biggest = heapq.nlargest(k, self.directories.items(), key=lambda item: self.stats[item[0]].total_size)
+        return [(d, self.stats[i].total_size) for i, d in biggest]
+
+
 class Search:
     def __init__(self,root_directory,filters,condition='AND'):
         self.root = root_directory
         self.filters = filters
-        self.condition = condition
+        self.condition = condition.upper()
+        self._predicate = FilterCompiler().compile(filters, condition)
 
     def check_conditions(self, file):
-        if self.condition == "AND":
-            return all(f.match(file) for f in self.filters)
-        else:
-            return any(f.match(file) for f in self.filters)
+        return self._predicate(file)
         
     def find_files(self):
         result = []
@@ -93,9 +547,379 @@ class Search:
         dfs(self.root)
         return result
 
+    def iter_files(self, limit=None):
+        # Lazily yields full paths of matches. Walks an explicit stack of
+        # subdirectory iterators, so memory grows with depth, not tree size.
+        if limit is not None and limit <= 0:
+            return
+        found = 0
+        stack = [(None, iter([self.root]))]
+        while stack:
+            parent, children = stack[-1]
+            directory = next(children, None)
+            if directory is None:
+                stack.pop()
+                continue
+            path = directory.name.rstrip("/") if parent is None else f"{parent}/{directory.name}"
+            for file in directory.files:
+                if self._predicate(file):
+                    yield f"{path}/{file.full_name}"
+                    found += 1
+                    if found == limit:
+                        return
+            stack.append((path, iter(directory.subDirectories)))
+
+
+# On-disk index layout (little endian):
+#   header | directory records | file records | extension records | string pool
+# Directories are numbered breadth first, so each directory's children and
+# files are contiguous runs of records.
+INDEX_MAGIC = b"FSIX"
+INDEX_VERSION = 2
+HEADER = struct.Struct("<4sHHIIIQQQQ")  # magic, version, flags, dirs, files, exts, 4 section offsets
+DIR_RECORD = struct.Struct("<IIIIIII")  # parent, name off/len, first file, file count, first child, child count
+FILE_RECORD = struct.Struct("<IHIQ")    # name off, name len, extension id, size
+STRING_RECORD = struct.Struct("<II")    # pool offset, length
+
+
+class FileIndexWriter:
+    def write(self, root: FileSystem, path):
+        pool = bytearray()
+        extensions = {}
+
+        def intern(text):
+            data = text.encode("utf-8")
+            pool.extend(data)
+            return len(pool) - len(data), len(data)
+
+        directories = [root]
+        parents = [0]
+        i = 0
+        while i < len(directories):
+            for sub in directories[i].subDirectories:
+                directories.append(sub)
+                parents.append(i)
+            i += 1
+
+        dir_records = bytearray()
+        file_records = bytearray()
+        next_child = 1
+        next_file = 0
+        for dir_id, directory in enumerate(directories):
+            name_off, name_len = intern(directory.name)
+            dir_records += DIR_RECORD.pack(parents[dir_id], name_off, name_len, next_file, len(directory.files),
+                                           next_child, len(directory.subDirectories))
+            next_child += len(directory.subDirectories)
+            for f in directory.files:
+                name_off, name_len = intern(f.name)
+                ext_id = extensions.setdefault(f.extension, len(extensions))
+                file_records += FILE_RECORD.pack(name_off, name_len, ext_id, f.size)
+            next_file += len(directory.files)
+
+        ext_records = bytearray()
+        for extension in extensions:
+            ext_records += STRING_RECORD.pack(*intern(extension))
+
+        dirs_off = HEADER.size
+        files_off = dirs_off + len(dir_records)
+        exts_off = files_off + len(file_records)
+        pool_off = exts_off + len(ext_records)
+        header = HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(directories), next_file, len(extensions),
+                             dirs_off, files_off, exts_off, pool_off)
+
+        # Write next to the target and rename over it, so readers see either
+        # the old index or the new one, never a partial file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for section in (header, dir_records, file_records, ext_records, pool):
+                    fh.write(section)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+# Read-only view of an index file. The file is memory mapped, so opening is
+# O(1) and a query only pages in the records it touches. A reader keeps
+# seeing the index it opened even if a writer replaces the file.
+class FileIndex:
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.dir_count, self.file_count, ext_count, \
+            self._dirs_off, self._files_off, exts_off, self._pool_off = HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a file index")
+        if version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported index version {version}, expected {INDEX_VERSION}")
+        self.extensions = [self._string(*STRING_RECORD.unpack_from(self._map, exts_off + i * STRING_RECORD.size))
+                           for i in range(ext_count)]
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, offset, length):
+        start = self._pool_off + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _directory(self, dir_id):
+        return DIR_RECORD.unpack_from(self._map, self._dirs_off + dir_id * DIR_RECORD.size)
+
+    def name(self, dir_id):
+        _, name_off, name_len, *_ = self._directory(dir_id)
+        return self._string(name_off, name_len)
+
+    def path(self, dir_id):
+        parts = []
+        while dir_id != 0:
+            parts.append(self.name(dir_id))
+            dir_id = self._directory(dir_id)[0]
+        return "/".join([self.name(0).rstrip("/")] + parts[::-1])
+
+    def subdirectories(self, dir_id):
+        *_, first_child, child_count = self._directory(dir_id)
+        return range(first_child, first_child + child_count)
+
+    def files(self, dir_id):
+        _, _, _, first_file, file_count, _, _ = self._directory(dir_id)
+        result = []
+        for i in range(first_file, first_file + file_count):
+            name_off, name_len, ext_id, size = FILE_RECORD.unpack_from(self._map, self._files_off + i * FILE_RECORD.size)
+            result.append(File(self._string(name_off, name_len), self.extensions[ext_id], size))
+        return result
+
+    def iter_files(self, filters, condition="AND", limit=None):
+        # Same results as Search.iter_files, in breadth-first directory order
+        predicate = FilterCompiler().compile(filters, condition)
+        found = 0
+        for dir_id in range(self.dir_count):
+            matches = [f for f in self.files(dir_id) if predicate(f)]
+            if not matches:
+                continue
+            path = self.path(dir_id)
+            for f in matches:
+                if found == limit:
+                    return
+                yield f"{path}/{f.full_name}"
+                found += 1
+
+
+# Tree shared with forked workers by copy-on-write instead of pickling
+_SHARED_UNITS = None
+
+
+def _search_work_unit(unit, filters, condition):
+    if isinstance(unit, int):
+        unit = _SHARED_UNITS[unit]
+    path, directory, span = unit
+    if span is not None:
+        start, stop = span
+        predicate = FilterCompiler().compile(filters, condition)
+        return [f"{path}/{f.full_name}" for f in directory.files[start:stop] if predicate(f)]
+    # Search the subtree under a root named by its full path
+    sub_root = FileSystem(path, True)
+    sub_root.files = directory.files
+    sub_root.subDirectories = directory.subDirectories
+    return list(Search(sub_root, filters, condition).iter_files())
+
+
+# Splits the tree into work units of roughly equal file count and searches
+# them in a process pool. Results come back in the same order as iter_files.
+class ParallelSearch(Search):
+    def __init__(self, root_directory, filters, condition="AND", workers=None, units_per_worker=4):
+        super().__init__(root_directory, filters, condition)
+        self.workers = workers or os.cpu_count() or 1
+        self.units_per_worker = units_per_worker
+
+    def partition(self):
+        # Units are (path, directory, span). span None covers the whole
+        # subtree; (start, stop) covers a slice of the directory's own files,
+        # used when its subtree is too large. A flat directory with millions
+        # of files becomes several slices, in order.
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.subDirectories)
+        counts = {}
+        for node in reversed(order):
+            counts[id(node)] = len(node.files) + sum(counts[id(sub)] for sub in node.subDirectories)
+
+        target = max(1, counts[id(self.root)] // (self.workers * self.units_per_worker))
+        units = []
+        stack = [(self.root.name.rstrip("/"), self.root)]
+        while stack:
+            path, node = stack.pop()
+            if counts[id(node)] <= target:
+                units.append((path, node, None))
+                continue
+            for start in range(0, len(node.files), target):
+                units.append((path, node, (start, min(start + target, len(node.files)))))
+            stack.extend((f"{path}/{sub.name}", sub) for sub in reversed(node.subDirectories))
+        return units
+
+    def find_paths(self):
+        global _SHARED_UNITS
+        units = self.partition()
+        if "fork" in multiprocessing.get_all_start_methods():
+            _SHARED_UNITS = units
+            context = multiprocessing.get_context("fork")
+            tasks = range(len(units))
+        else:
+            context = multiprocessing.get_context()
+            tasks = units
+        try:
+            with context.Pool(self.workers) as pool:
+                parts = pool.starmap(_search_work_unit, [(t, self.filters, self.condition) for t in tasks])
+        finally:
+            _SHARED_UNITS = None
+        return [p for part in parts for p in part]
+
+
+def build_synthetic_tree(n_files, fan_out=10, files_per_dir=50, seed=42):
+    rng = random.Random(seed)
+    extensions = ["txt", "pdf", "py", "log", "csv", "jpg"]
+    root = FileSystem("/", True)
+    queue = deque([root])
+    created = 0
+    while created < n_files:
+        directory = queue.popleft()
+        for _ in range(min(files_per_dir, n_files - created)):
+            directory.files.append(File(f"file{created}", rng.choice(extensions), rng.randint(0, 1000)))
+            created += 1
+        for i in range(fan_out):
+            sub = FileSystem(f"d{i}", True)
+            directory.subDirectories.append(sub)
+            queue.append(sub)
+    return root
+
+
+def benchmark_filters(n_files=200_000):
+    root = build_synthetic_tree(n_files)
+    files = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        files.extend(directory.files)
+        stack.extend(directory.subDirectories)
+
+    tree = OrFilter(AndFilter(ExtensionFilter("txt"), SizeFilter(500, ">=")), NameFilter("file7"))
+    fused = FilterCompiler().compile([tree])
+
+    start = time.perf_counter()
+    interpreted_hits = sum(1 for f in files if tree.match(f))
+    interpreted = (time.perf_counter() - start) / len(files) * 1e9
+
+    start = time.perf_counter()
+    fused_hits = sum(1 for f in files if fused(f))
+    compiled = (time.perf_counter() - start) / len(files) * 1e9
+
+    assert interpreted_hits == fused_hits
+    print(f"Filter tree: {interpreted:.0f} ns/file | Fused: {compiled:.0f} ns/file "
+          f"({interpreted / compiled:.1f}x) over {len(files)} files")
+
+
+
+def benchmark_rollups(n_files=200_000):
+    root = build_synthetic_tree(n_files)
+    start = time.perf_counter()
+    rollups = DirectoryRollups(root, k=100)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    logs = list(Search(root, [ExtensionFilter("log")]).iter_files())
+    traversal = time.perf_counter() - start
+
+    start = time.perf_counter()
+    top_logs = rollups.largest_files(100, extension="log")
+    biggest = rollups.largest_directories(5)
+    queries = time.perf_counter() - start
+
+    # Removing the largest files forces a lazy top-K rebuild on the next query
+    directory = root.subDirectories[0].subDirectories[0]
+    for f in list(directory.files):
+        rollups.remove_file(directory, f)
+    rollups.add_file(directory, File("huge", "log", 10_000))
+    start = time.perf_counter()
+    assert rollups.largest_files(1, extension="log")[0].name == "huge"
+    after_update = time.perf_counter() - start
+
+    print(f"\nRollups built in {build * 1000:.0f} ms. Traversal for {len(logs)} .log files: "
+          f"{traversal * 1000:.1f} ms | top-100 .log + top-5 dirs: {queries * 1000:.2f} ms | "
+          f"after updates: {after_update * 1000:.2f} ms")
+    print(f"Largest .log: {top_logs[0]} | Biggest dirs: {[(d.name, size) for d, size in biggest[:3]]}")
+
+
+def benchmark_parallel(n_files=5_000_000, worker_counts=None):
+    root = build_synthetic_tree(n_files)
+    filters = [OrFilter(AndFilter(ExtensionFilter("log"), SizeFilter(990, ">")), NameFilter("file42"))]
+    start = time.perf_counter()
+    expected = list(Search(root, filters).iter_files())
+    serial = time.perf_counter() - start
+    print(f"\nSerial search over {n_files} files: {serial * 1000:.0f} ms ({len(expected)} hits)")
+    for workers in worker_counts or sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        result = ParallelSearch(root, filters, workers=workers).find_paths()
+        elapsed = time.perf_counter() - start
+        assert result == expected
+        print(f"  {workers} workers: {elapsed * 1000:.0f} ms ({serial / elapsed:.2f}x)")
+
+
+def benchmark_refresh(n_dirs=200, files_per_dir=20, fractions=(0.0, 0.01, 0.1, 0.5)):
+    import shutil
+    import tempfile
+
+    base = tempfile.mkdtemp()
+    try:
+        for d in range(n_dirs):
+            path = os.path.join(base, f"d{d // 20}", f"d{d}")
+            os.makedirs(path)
+            for i in range(files_per_dir):
+                with open(os.path.join(path, f"f{i}.txt"), "w") as fh:
+                    fh.write("x" * i)
+
+        crawler = DiskCrawler()
+        root = crawler.crawl(base)
+        refresher = IncrementalRefresher(crawler)
+        start = time.perf_counter()
+        crawler.crawl(base)
+        full = time.perf_counter() - start
+        print(f"\nFull crawl of {n_dirs * files_per_dir} files: {full * 1000:.1f} ms")
+
+        rng = random.Random(7)
+        for round_no, fraction in enumerate(fractions):
+            for d in rng.sample(range(n_dirs), int(n_dirs * fraction)):
+                with open(os.path.join(base, f"d{d // 20}", f"d{d}", f"new{round_no}.txt"), "w") as fh:
+                    fh.write("new")
+            start = time.perf_counter()
+            changes = refresher.refresh(root)
+            elapsed = time.perf_counter() - start
+            print(f"Refresh with {fraction:.0%} dirs changed: {elapsed * 1000:.1f} ms, "
+                  f"{refresher.rescanned} dirs rescanned, {changes}")
+    finally:
+        shutil.rmtree(base)
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="File system search demo")
+    parser.add_argument("--benchmark", action="store_true", help="also run the timing benchmarks")
+    args = parser.parse_args()
+
     # Create files
     f1 = File("readme", "txt", 10)
     f2 = File("report", "pdf", 20)
@@ -126,3 +950,49 @@ if __name__ == "__main__":
     filters = [ExtensionFilter("txt"), SizeFilter(15, ">=")]
     search = Search(root, filters, condition="AND")
     print("\nMatching files:", search.find_files())  # Expect: ['notes']
+
+    # Nested AND/OR tree
+    tree = OrFilter(AndFilter(ExtensionFilter("txt"), SizeFilter(15, "<")), NameFilter("main"))
+    print("Matching files:", Search(root, [tree]).find_files())  # Expect: ['readme', 'main']
+
+    # Lazy search: full paths, stops after the first match
+    print("First match:", list(Search(root, [tree]).iter_files(limit=1)))  # Expect: ['/readme.txt']
+    print("All paths:", list(Search(root, [ExtensionFilter("txt")]).iter_files()))  # Expect: ['/readme.txt', '/sub/nested/notes.txt']
+
+    # A chain deeper than the recursion limit
+    deep = FileSystem("/", True)
+    node = deep
+    for i in range(5000):
+        child = FileSystem(f"level{i}", True)
+        node.subDirectories.append(child)
+        node = child
+    node.files.append(File("bottom", "txt", 1))
+    print("Deep match depth:", next(Search(deep, [NameFilter("bottom")]).iter_files()).count("/"))  # Expect: 5001
+
+    # Index a real directory
+    crawler = DiskCrawler(max_workers=8, exclude=[".git", "__pycache__"])
+    disk_root = crawler.crawl(os.path.dirname(os.path.abspath(__file__)))
+    py_files = Search(disk_root, [ExtensionFilter("py")]).find_files()
+    print(f"\nCrawled {crawler.entries} entries ({crawler.entries_per_sec:,.0f} entries/sec), "
+          f"{len(py_files)} .py files")
+
+    if args.benchmark:
+        print()
+        benchmark_filters()
+        benchmark_refresh()
+        benchmark_rollups()
+        benchmark_parallel(n_files=500_000)
+
+        # Persist the synthetic tree and reopen it instantly via mmap
+        index_path = os.path.join(tempfile.gettempdir(), "fs_search_demo.idx")
+        big = build_synthetic_tree(200_000)
+        start = time.perf_counter()
+        FileIndexWriter().write(big, index_path)
+        written = time.perf_counter() - start
+        start = time.perf_counter()
+        with FileIndex(index_path) as index:
+            opened = time.perf_counter() - start
+            hits = list(index.iter_files([NameFilter("file7")]))
+            print(f"\nIndex: {os.path.getsize(index_path) / 1e6:.1f} MB written in {written * 1000:.0f} ms, "
+                  f"opened in {opened * 1000:.2f} ms; {index.file_count} files, match: {hits}")
+        os.unlink(index_path)
@@ -7,7 +7,19 @@
 
 
 from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from array import array
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from itertools import count
+import math
+import os
+import random
+import struct
+import threading
+import time
+import weakref
 
 #Observer
 class Observer(ABC):
@@ -29,42 +41,1146 @@ class Subject(ABC):
     def notify_observer(self):
         pass
 
+# Subject base holding observers through weak references in an insertion-
+# ordered dict keyed by id(): O(1) add/remove, and garbage-collected observers
+# drop out without an explicit remove. Notification iterates a snapshot, so
+# observers may subscribe or unsubscribe while being notified.
+class WeakSubject(Subject):
+    def __init__(self):
+        self._refs = {}
+        # Refs whose observer died; the GC callback only queues them and they
+        # are removed outside any iteration
+        self._dead = []
+
+    def _purge(self):
+        while self._dead:
+            ref = self._dead.pop()
+            if self._refs.get(ref.key) is ref:
+                del self._refs[ref.key]
+                self._forget(ref.key)
+
+    def _forget(self, key):
+        pass
+
+    def add_observer(self, observer: Observer):
+        self._purge()
+        key = id(observer)
+        if key not in self._refs:
+            self._refs[key] = weakref.KeyedRef(observer, self._dead.append, key)
+
+    def remove_observer(self, observer: Observer):
+        self._purge()
+        ref = self._refs.get(id(observer))
+        if ref is None or ref() is not observer:
+            raise ValueError("observer is not subscribed")
+        del self._refs[id(observer)]
+        self._forget(id(observer))
+
+    @property
+    def observers(self):
+        self._purge()
+        return [observer for observer in [ref() for ref in list(self._refs.values())] if observer is not None]
+
+# Sliding-window statistics with O(1) amortized updates: Welford-style mean
+# and variance with add/remove, monotonic deques for min/max. Percentiles
+# are optional; they keep a sorted copy of the window (O(log n) search plus a
+# memmove per update).
+class RollingStats:
+    def __init__(self, size: int, track_percentiles=False):
+        self.size = size
+        self.window = deque(maxlen=size)
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._count = 0  # total readings seen, used to expire min/max entries
+        self._min = deque()  # (reading number, value), values increasing
+        self._max = deque()  # (reading number, value), values decreasing
+        self._sorted = [] if track_percentiles else None
+
+    def add(self, value: float):
+        if len(self.window) == self.size:
+            self._remove(self.window[0])
+        self.window.append(value)
+
+        n = len(self.window)
+        delta = value - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (value - self._mean)
+
+        self._count += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((self._count, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._count, value))
+        oldest = self._count - len(self.window)
+        for extremes in (self._min, self._max):
+            if extremes[0][0] <= oldest:
+                extremes.popleft()
+
+        if self._sorted is not None:
+            insort(self._sorted, value)
+
+    def _remove(self, value):
+        n = len(self.window) - 1
+        if n == 0:
+            self._mean = self._m2 = 0.0
+        else:
+            delta = value - self._mean
+            self._mean -= delta / n
+            self._m2 = max(0.0, self._m2 - delta * (value - self._mean))
+        if self._sorted is not None:
+            del self._sorted[bisect_left(self._sorted, value)]
+
+    def __len__(self):
+        return len(self.window)
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def min(self):
+        return self._min[0][1]
+
+    @property
+    def max(self):
+        return self._max[0][1]
+
+    @property
+    def variance(self):
+        n = len(self.window)
+        return self._m2 / (n - 1) if n > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, q: float):
+        if self._sorted is None:
+            raise ValueError("RollingStats was created without track_percentiles")
+        index = min(len(self._sorted) - 1, int(q / 100 * len(self._sorted)))
+        return self._sorted[index]
+
+
 class Thermostat(Observer):
-    def __init__(self) -> None:
-        self.history = deque(maxlen=24)
+    def __init__(self, window=24) -> None:
+        self.stats = RollingStats(window)
+        self.history = self.stats.window
     
     def update(self, temp: float):
-        self.history.append(temp)
+        self.stats.add(temp)
         self.display(temp)
 
     def display(self, temp: float):
-        avg = sum(self.history) / len(self.history)
-        print(f"[ThermostatDisplay] Current: {temp}°C | Last 24h Avg: {avg:.2f}°C")
+        print(f"[ThermostatDisplay] Current: {temp}°C | Last 24h Avg: {self.stats.mean:.2f}°C "
+              f"| Min: {self.stats.min}°C | Max: {self.stats.max}°C")
+
+
+# One downsampling level: fixed-size ring of time buckets, each holding the
+# count/sum/min/max of the readings that fell into it.
+class Tier:
+    def __init__(self, resolution: float, retention: float):
+        self.resolution = resolution
+        self.retention = retention
+        self.capacity = int(retention // resolution)
+        self.bucket_ids = array("q", [-1]) * self.capacity
+        self.counts = array("l", [0]) * self.capacity
+        self.sums = array("d", [0.0]) * self.capacity
+        self.mins = array("d", [0.0]) * self.capacity
+        self.maxs = array("d", [0.0]) * self.capacity
+
+    def add(self, ts: float, value: float):
+        bucket = int(ts // self.resolution)
+        slot = bucket % self.capacity
+        if bucket < self.bucket_ids[slot]:
+            # Too late: this bucket has already rotated out of the tier
+            return
+        if self.bucket_ids[slot] != bucket:
+            # Slot still holds an expired bucket: overwrite it
+            self.bucket_ids[slot] = bucket
+            self.counts[slot] = 1
+            self.sums[slot] = self.mins[slot] = self.maxs[slot] = value
+            return
+        self.counts[slot] += 1
+        self.sums[slot] += value
+        if value < self.mins[slot]:
+            self.mins[slot] = value
+        if value > self.maxs[slot]:
+            self.maxs[slot] = value
+
+    def buckets(self, start: float, end: float):
+        # (bucket start time, count, mean, min, max) for live buckets in [start, end]
+        first = max(int(start // self.resolution), int(end // self.resolution) - self.capacity + 1)
+        for bucket in range(first, int(end // self.resolution) + 1):
+            slot = bucket % self.capacity
+            if self.bucket_ids[slot] == bucket:
+                count = self.counts[slot]
+                yield bucket * self.resolution, count, self.sums[slot] / count, self.mins[slot], self.maxs[slot]
+
+
+# Time-windowed history with fixed memory: every reading lands in each tier,
+# and a query reads only the finest tier that still covers its window.
+class TimeSeriesStore:
+    DEFAULT_TIERS = ((1, 10 * 60), (60, 24 * 3600), (3600, 30 * 24 * 3600))
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [Tier(resolution, retention) for resolution, retention in sorted(tiers)]
+        self.latest = None
+
+    def add(self, value: float, ts: float = None):
+        ts = time.time() if ts is None else ts
+        self.latest = ts if self.latest is None else max(self.latest, ts)
+        for tier in self.tiers:
+            tier.add(ts, value)
+
+    def tier_for(self, start: float):
+        for tier in self.tiers:
+            if self.latest - start <= tier.retention:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, start: float, end: float = None):
+        if self.latest is None:
+            return []
+        end = self.latest if end is None else end
+        return list(self.tier_for(start).buckets(start, end))
+
+    def summary(self, seconds: float):
+        # (count, mean, min, max) over the last `seconds`
+        if self.latest is None:
+            return 0, None, None, None
+        buckets = self.query(self.latest - seconds)
+        count = sum(b[1] for b in buckets)
+        if not count:
+            return 0, None, None, None
+        mean = sum(b[1] * b[2] for b in buckets) / count
+        return count, mean, min(b[3] for b in buckets), max(b[4] for b in buckets)
+
+
+class RecordingThermostat(Thermostat):
+    def __init__(self, store: TimeSeriesStore = None) -> None:
+        super().__init__()
+        self.store = store or TimeSeriesStore()
+
+    def update(self, temp: float):
+        self.store.add(temp)
+        super().update(temp)
+
+    def display(self, temp: float):
+        count, avg, low, high = self.store.summary(24 * 3600)
+        print(f"[RecordingThermostat] Current: {temp}°C | 24h ({count} readings) Avg: {avg:.2f}°C "
+              f"| Min: {low}°C | Max: {high}°C")
+
+
+# Declarative subscriptions evaluated centrally by the subject, so observers
+# are only called when a change is relevant to them:
+# - threshold: the value crosses a level. Levels are kept sorted, and the
+#   crossed ones are found by binary search between the old and new value.
+# - min delta: the value moved at least delta since this observer last woke.
+# - rate: |change| / elapsed seconds reaches the given rate. Rates are kept
+#   sorted, so the woken subscribers are a prefix.
+class FilteredSubscriptions:
+    def __init__(self, clock=time.monotonic, on_forget=None):
+        self.clock = clock
+        self.thresholds = []  # sorted (threshold, seq, ref)
+        self.rates = []       # sorted (rate, seq, ref)
+        self.deltas = {}      # id(observer) -> [ref, delta, last value]
+        self._seq = count()
+        self.last_time = None
+        # Refs whose observer died; the GC callback only queues them and
+        # _purge drops their entries outside any iteration
+        self._dead = []
+        # Called with id(observer) once a dead observer's entries are gone
+        self.on_forget = on_forget
+
+    def _ref(self, observer):
+        return weakref.KeyedRef(observer, self._dead.append, id(observer))
+
+    def _purge(self):
+        if not self._dead:
+            return
+        dead, keys = set(), set()
+        while self._dead:
+            ref = self._dead.pop()
+            dead.add(id(ref))
+            keys.add(ref.key)
+        self.thresholds = [e for e in self.thresholds if id(e[2]) not in dead]
+        self.rates = [e for e in self.rates if id(e[2]) not in dead]
+        for key in keys:
+            entry = self.deltas.get(key)
+            if entry is not None and id(entry[0]) in dead:
+                del self.deltas[key]
+            if self.on_forget is not None:
+                self.on_forget(key)
+
+    def add_threshold(self, observer, threshold: float):
+        self._purge()
+        insort(self.thresholds, (threshold, next(self._seq), self._ref(observer)))
+
+    def add_min_delta(self, observer, delta: float):
+        self._purge()
+        self.deltas[id(observer)] = [self._ref(observer), delta, None]
+
+    def add_rate(self, observer, rate: float):
+        self._purge()
+        insort(self.rates, (rate, next(self._seq), self._ref(observer)))
 
+    def remove(self, observer):
+        self._purge()
+        self.thresholds = [e for e in self.thresholds if e[2]() is not observer]
+        self.rates = [e for e in self.rates if e[2]() is not observer]
+        self.deltas.pop(id(observer), None)
+
+    def matches(self, old: float, new: float, now: float = None):
+        # now defaults to the clock; pass the publish time when matching later
+        self._purge()
+        now = self.clock() if now is None else now
+        woken = {}
+        if old is not None and old != new:
+            low, high = min(old, new), max(old, new)
+            start = bisect_right(self.thresholds, (low, math.inf))
+            end = bisect_right(self.thresholds, (high, math.inf))
+            for _, _, ref in self.thresholds[start:end]:
+                observer = ref()
+                if observer is not None:
+                    woken[id(observer)] = observer
+
+        for entry in self.deltas.values():
+            ref, delta, last = entry
+            if last is None or abs(new - last) >= delta:
+                observer = ref()
+                if observer is not None:
+                    woken[id(observer)] = observer
+                    entry[2] = new
+
+        if old is not None and self.last_time is not None and now > self.last_time:
+            rate = abs(new - old) / (now - self.last_time)
+            for _, _, ref in self.rates[:bisect_right(self.rates, (rate, math.inf))]:
+                observer = ref()
+                if observer is not None:
+                    woken[id(observer)] = observer
+        self.last_time = now
+        return list(woken.values())
 
 # Concrete Subject
-class WeatherStation(Subject):
-    def __init__(self):
-        self.observers = []
+class WeatherStation(WeakSubject):
+    def __init__(self, verbose=True):
+        super().__init__()
         self._temperature = None
+        self.verbose = verbose
+        self.filtered = FilteredSubscriptions()
     
     def set_temperature(self, temp: float):
-        print(f"\n[WeatherStation] New temperature set: {temp}°C")
+        if self.verbose:
+            print(f"\n[WeatherStation] New temperature set: {temp}°C")
+        old_temperature = self._temperature
         self._temperature = temp
+        self._publish(old_temperature, temp)
+
+    def _publish(self, old: float, new: float):
         self.notify_observer()
+        for observer in self.filtered.matches(old, new):
+            observer.update(new)
 
-    def add_observer(self, observer: Observer):
-        self.observers.append(observer)
+    def subscribe_threshold(self, observer: Observer, threshold: float):
+        self.filtered.add_threshold(observer, threshold)
 
-    def remove_observer(self, observer: Observer):
-        self.observers.remove(observer)
+    def subscribe_min_delta(self, observer: Observer, delta: float):
+        self.filtered.add_min_delta(observer, delta)
+
+    def subscribe_rate(self, observer: Observer, rate: float):
+        self.filtered.add_rate(observer, rate)
+
+    def unsubscribe_filtered(self, observer: Observer):
+        self.filtered.remove(observer)
 
     def notify_observer(self):
         for observer in self.observers:
             observer.update(self._temperature)
 
+class ReadingBatch:
+    def __init__(self, latest, count, minimum, maximum, mean):
+        self.latest = latest
+        self.count = count
+        self.min = minimum
+        self.max = maximum
+        self.mean = mean
+
+    def __repr__(self):
+        return (f"ReadingBatch(latest={self.latest}, count={self.count}, min={self.min}, "
+                f"max={self.max}, mean={self.mean:.2f})")
+
+
+# Sits between a WeatherStation and its observers and collapses bursts of
+# readings into one notification at most every max_latency seconds. Observers
+# with update_batch() receive the batch statistics; others get update(latest).
+# With auto_flush a timer delivers the trailing batch of a burst.
+class CoalescingRelay(Observer, WeakSubject):
+    def __init__(self, max_latency=0.25, clock=time.monotonic, auto_flush=True):
+        super().__init__()
+        self.max_latency = max_latency
+        self.clock = clock
+        self.auto_flush = auto_flush
+        self.lock = threading.Lock()
+        self.timer = None
+        self._reset()
+
+    def _reset(self):
+        self.batch_start = None
+        self.count = 0
+        self.total = 0.0
+        self.latest = self.minimum = self.maximum = None
+
+    def update(self, temp: float):
+        with self.lock:
+            now = self.clock()
+            if self.batch_start is None:
+                self.batch_start = now
+                self.minimum = self.maximum = temp
+                if self.auto_flush:
+                    self.timer = threading.Timer(self.max_latency, self.flush)
+                    self.timer.daemon = True
+                    self.timer.start()
+            self.count += 1
+            self.total += temp
+            self.latest = temp
+            self.minimum = min(self.minimum, temp)
+            self.maximum = max(self.maximum, temp)
+            batch = self._take() if now - self.batch_start >= self.max_latency else None
+        if batch:
+            self.notify_observer(batch)
+
+    def _take(self):
+        batch = ReadingBatch(self.latest, self.count, self.minimum, self.maximum, self.total / self.count)
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self._reset()
+        return batch
+
+    def flush(self):
+        with self.lock:
+            batch = self._take() if self.count else None
+        if batch:
+            self.notify_observer(batch)
+
+    def notify_observer(self, batch: ReadingBatch = None):
+        for observer in self.observers:
+            if hasattr(observer, "update_batch"):
+                observer.update_batch(batch)
+            else:
+                observer.update(batch.latest)
+
+
+class BackpressurePolicy(Enum):
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+    COALESCE = "coalesce"  # keep only the newest pending reading
+
+
+# Bounded per-observer queue. At most one pool task drains it at a time, so
+# each observer still sees readings in order.
+class ObserverMailbox:
+    def __init__(self, observer: Observer, pool, maxsize=64, policy=BackpressurePolicy.DROP_OLDEST):
+        self.observer_ref = weakref.ref(observer)
+        self.pool = pool
+        self.maxsize = 1 if policy == BackpressurePolicy.COALESCE else maxsize
+        self.policy = policy
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.scheduled = False
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def put(self, temp: float):
+        with self.cond:
+            if len(self.queue) >= self.maxsize:
+                if self.policy == BackpressurePolicy.BLOCK:
+                    self.cond.wait_for(lambda: len(self.queue) < self.maxsize)
+                else:
+                    self.queue.popleft()
+                    self.dropped += 1
+            self.queue.append(temp)
+            if not self.scheduled:
+                self.scheduled = True
+                self.pool.submit(self.drain)
+
+    def drain(self):
+        while True:
+            with self.cond:
+                if not self.queue:
+                    self.scheduled = False
+                    self.cond.notify_all()
+                    return
+                temp = self.queue.popleft()
+                self.cond.notify_all()
+            observer = self.observer_ref()
+            if observer is None:
+                continue
+            try:
+                observer.update(temp)
+            except Exception:
+                # One failing display must not stop delivery to it or others
+                self.errors += 1
+            self.delivered += 1
+
+    def wait_idle(self):
+        with self.cond:
+            self.cond.wait_for(lambda: not self.queue and not self.scheduled)
+
+
+# WeatherStation whose set_temperature only appends to an inbox. A dispatcher
+# thread fans readings out to per-observer mailboxes drained by a thread
+# pool, so a slow observer never stalls the producer or the other observers.
+# Filtered subscriptions are matched on the dispatcher thread too, against
+# the publish time, and their observers are woken through mailboxes.
+class AsyncWeatherStation(WeatherStation):
+    def __init__(self, max_workers=4, inbox_size=10_000, verbose=True):
+        super().__init__(verbose)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.mailboxes = {}
+        self.filtered_mailboxes = {}
+        self.filtered_lock = threading.Lock()
+        self.filtered.on_forget = lambda key: self.filtered_mailboxes.pop(key, None)
+        self.inbox = deque()
+        self.inbox_size = inbox_size
+        self.inbox_cond = threading.Condition()
+        self.pending = 0
+        self.closed = False
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def add_observer(self, observer: Observer, maxsize=64, policy=BackpressurePolicy.DROP_OLDEST):
+        with self.inbox_cond:
+            super().add_observer(observer)
+            self.mailboxes[id(observer)] = ObserverMailbox(observer, self.pool, maxsize, policy)
+
+    def remove_observer(self, observer: Observer):
+        with self.inbox_cond:
+            super().remove_observer(observer)
+
+    def _forget(self, key):
+        self.mailboxes.pop(key, None)
+
+    def _subscribe_filtered(self, add, observer, value, maxsize, policy):
+        with self.filtered_lock:
+            add(observer, value)
+            mailbox = self.filtered_mailboxes.get(id(observer))
+            if mailbox is None or mailbox.observer_ref() is not observer:
+                self.filtered_mailboxes[id(observer)] = ObserverMailbox(observer, self.pool, maxsize, policy)
+
+    def subscribe_threshold(self, observer: Observer, threshold: float, maxsize=64, policy=BackpressurePolicy.DROP_OLDEST):
+        self._subscribe_filtered(self.filtered.add_threshold, observer, threshold, maxsize, policy)
+
+    def subscribe_min_delta(self, observer: Observer, delta: float, maxsize=64, policy=BackpressurePolicy.DROP_OLDEST):
+        self._subscribe_filtered(self.filtered.add_min_delta, observer, delta, maxsize, policy)
+
+    def subscribe_rate(self, observer: Observer, rate: float, maxsize=64, policy=BackpressurePolicy.DROP_OLDEST):
+        self._subscribe_filtered(self.filtered.add_rate, observer, rate, maxsize, policy)
+
+    def unsubscribe_filtered(self, observer: Observer):
+        with self.filtered_lock:
+            self.filtered.remove(observer)
+            self.filtered_mailboxes.pop(id(observer), None)
+
+    def _mailbox_for(self, observer):
+        # An observer that is also a plain subscriber keeps one mailbox, so
+        # its updates stay ordered and never run concurrently
+        mailbox = self.mailboxes.get(id(observer))
+        if mailbox is None or mailbox.observer_ref() is not observer:
+            mailbox = self.filtered_mailboxes.get(id(observer))
+        return mailbox
+
+    def _enqueue(self, entry):
+        # O(1): the dispatcher does the per-observer work
+        with self.inbox_cond:
+            self.inbox_cond.wait_for(lambda: len(self.inbox) < self.inbox_size or self.closed)
+            if self.closed:
+                raise RuntimeError("AsyncWeatherStation is closed")
+            self.inbox.append(entry)
+            self.pending += 1
+            self.inbox_cond.notify_all()
+
+    def notify_observer(self):
+        self._enqueue((None, self._temperature, None))
+
+    def _publish(self, old: float, new: float):
+        self._enqueue((old, new, self.filtered.clock()))
+
+    def _dispatch(self):
+        while True:
+            with self.inbox_cond:
+                self.inbox_cond.wait_for(lambda: self.inbox or self.closed)
+                if not self.inbox:
+                    return
+                old, temp, published = self.inbox.popleft()
+                self._purge()
+                mailboxes = list(self.mailboxes.values())
+                self.inbox_cond.notify_all()
+            for mailbox in mailboxes:
+                mailbox.put(temp)
+            if published is not None:
+                # A set_temperature reading: wake the matching filtered observers
+                with self.filtered_lock:
+                    woken = [self._mailbox_for(observer) for observer in self.filtered.matches(old, temp, published)]
+                for mailbox in woken:
+                    if mailbox is not None:
+                        mailbox.put(temp)
+            with self.inbox_cond:
+                self.pending -= 1
+                self.inbox_cond.notify_all()
+
+    def flush(self):
+        # Wait until every published reading has been delivered or dropped
+        with self.inbox_cond:
+            self.inbox_cond.wait_for(lambda: not self.pending)
+            self._purge()
+            mailboxes = list(self.mailboxes.values())
+        with self.filtered_lock:
+            mailboxes += list(self.filtered_mailboxes.values())
+        for mailbox in mailboxes:
+            mailbox.wait_idle()
+
+    def close(self):
+        self.flush()
+        with self.inbox_cond:
+            self.closed = True
+            self.inbox_cond.notify_all()
+        self.dispatcher.join()
+        self.pool.shutdown()
+
+
+# History of one station in a mirrored ring buffer: every sample is stored
+# at slot and slot + capacity, so the latest n samples are always one
+# contiguous range and can be handed out as a zero-copy memoryview.
+class StationSeries:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+        self.timestamps = array("d", bytes(16 * capacity))
+        self.values = array("d", bytes(16 * capacity))
+
+    def extend(self, timestamps: array, values: array):
+        if len(values) > self.capacity:
+            self.count += len(values) - self.capacity
+            timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+        start = self.count % self.capacity
+        first = min(len(values), self.capacity - start)
+        rest = len(values) - first
+        for column, data in ((self.timestamps, timestamps), (self.values, values)):
+            column[start:start + first] = data[:first]
+            column[start + self.capacity:start + self.capacity + first] = data[:first]
+            if rest:
+                column[:rest] = data[first:]
+                column[self.capacity:self.capacity + rest] = data[first:]
+        self.count += len(values)
+
+    def window(self, n: int = None):
+        # (timestamps, values) memoryviews over the latest n samples, oldest first
+        n = min(n or self.capacity, self.count, self.capacity)
+        end = self.count % self.capacity + self.capacity
+        return memoryview(self.timestamps)[end - n:end], memoryview(self.values)[end - n:end]
+
+
+class SeriesObserver(ABC):
+    @abstractmethod
+    def on_ingest(self, pipeline, station_ids):
+        pass
+
+
+# Central history for many stations. Batches of (station_id, ts, value) are
+# grouped per station and written with slice assignments; observers read
+# shared windows instead of each keeping its own copy of the history.
+class IngestPipeline(WeakSubject):
+    def __init__(self, capacity=24 * 3600):
+        super().__init__()
+        self.capacity = capacity
+        self.series = {}
+
+    def ingest(self, records):
+        grouped = {}
+        for station_id, ts, value in records:
+            columns = grouped.get(station_id)
+            if columns is None:
+                columns = grouped[station_id] = (array("d"), array("d"))
+            columns[0].append(ts)
+            columns[1].append(value)
+        for station_id, (timestamps, values) in grouped.items():
+            series = self.series.get(station_id)
+            if series is None:
+                series = self.series[station_id] = StationSeries(self.capacity)
+            series.extend(timestamps, values)
+        self.notify_observer(grouped.keys())
+
+    def window(self, station_id, n: int = None):
+        return self.series[station_id].window(n)
+
+    def notify_observer(self, station_ids=()):
+        for observer in self.observers:
+            observer.on_ingest(self, station_ids)
+
+
+class SharedWindowThermostat(SeriesObserver):
+    def __init__(self, station_id, window=24):
+        self.station_id = station_id
+        self.window = window
+        self.average = None
+
+    def on_ingest(self, pipeline, station_ids):
+        if self.station_id in station_ids:
+            _, values = pipeline.window(self.station_id, self.window)
+            self.average = sum(values) / len(values)
+
+
+class BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.bits = 0
+
+    def write(self, value: int, width: int):
+        self.acc = (self.acc << width) | (value & ((1 << width) - 1))
+        self.bits += width
+        while self.bits >= 8:
+            self.bits -= 8
+            self.data.append((self.acc >> self.bits) & 0xFF)
+        self.acc &= (1 << self.bits) - 1
+
+    def getvalue(self) -> bytes:
+        if self.bits:
+            return bytes(self.data) + bytes([(self.acc << (8 - self.bits)) & 0xFF])
+        return bytes(self.data)
+
+
+class BitReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read(self, width: int) -> int:
+        first = self.pos >> 3
+        last = (self.pos + width + 7) >> 3
+        chunk = int.from_bytes(self.data[first:last], "big")
+        unused = (last << 3) - self.pos - width
+        self.pos += width
+        return (chunk >> unused) & ((1 << width) - 1)
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack("<Q", struct.pack("<d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
+# Gorilla-style block codec. Timestamps are integer milliseconds stored as
+# delta-of-delta with variable-width buckets; values are XORed with the
+# previous value and only the meaningful bits are written.
+class GorillaBlock:
+    # (prefix, prefix width, two's complement payload width) per delta-of-delta bucket
+    DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12))
+
+    @classmethod
+    def encode(cls, timestamps, values) -> bytes:
+        out = BitWriter()
+        prev_ts, prev_delta = timestamps[0], 0
+        prev_bits = _float_bits(values[0])
+        out.write(prev_bits, 64)
+        prev_leading, prev_trailing = 65, 0
+
+        for ts, value in zip(timestamps[1:], values[1:]):
+            delta = ts - prev_ts
+            dod = delta - prev_delta
+            prev_ts, prev_delta = ts, delta
+            if dod == 0:
+                out.write(0, 1)
+            else:
+                for prefix, prefix_width, width in cls.DOD_BUCKETS:
+                    if -(1 << (width - 1)) <= dod < (1 << (width - 1)):
+                        out.write(prefix, prefix_width)
+                        out.write(dod, width)
+                        break
+                else:
+                    out.write(0b1111, 4)
+                    out.write(dod, 64)
+
+            bits = _float_bits(value)
+            xor = bits ^ prev_bits
+            prev_bits = bits
+            if xor == 0:
+                out.write(0, 1)
+                continue
+            leading = min(64 - xor.bit_length(), 31)
+            trailing = (xor & -xor).bit_length() - 1
+            if leading >= prev_leading and trailing >= prev_trailing:
+                # Fits in the previous meaningful-bit window
+                out.write(0b10, 2)
+                out.write(xor >> prev_trailing, 64 - prev_leading - prev_trailing)
+            else:
+                meaningful = 64 - leading - trailing
+                out.write(0b11, 2)
+                out.write(leading, 5)
+                out.write(meaningful - 1, 6)
+                out.write(xor >> trailing, meaningful)
+                prev_leading, prev_trailing = leading, trailing
+        return out.getvalue()
+
+    @classmethod
+    def decode(cls, payload: bytes, start_ts: int, count: int):
+        reader = BitReader(payload)
+        prev_bits = reader.read(64)
+        ts, delta = start_ts, 0
+        yield ts, _bits_float(prev_bits)
+        leading = trailing = 0
+        for _ in range(count - 1):
+            if reader.read(1) == 0:
+                dod = 0
+            else:
+                width = 64
+                for bucket_width in (7, 9, 12):
+                    if reader.read(1) == 0:
+                        width = bucket_width
+                        break
+                dod = reader.read(width)
+                if dod >= 1 << (width - 1):
+                    dod -= 1 << width
+            delta += dod
+            ts += delta
+
+            if reader.read(1) == 1:
+                if reader.read(1) == 1:
+                    leading = reader.read(5)
+                    trailing = 64 - leading - (reader.read(6) + 1)
+                prev_bits ^= reader.read(64 - leading - trailing) << trailing
+            yield ts, _bits_float(prev_bits)
+
+
+# Append-only archive of (timestamp, value) readings in compressed blocks.
+# Each block header carries its time range and min/max, so range queries
+# seek past blocks that cannot overlap without decoding them. The range is
+# the min/max timestamp, not first/last, since a wall clock can step back.
+class TemperatureArchive:
+    MAGIC = b"TARC\x02"
+    # first ms, min ms, max ms, count, min value, max value, payload bytes
+    HEADER = struct.Struct("<qqqIddI")
+
+    def __init__(self, path, block_size=1024):
+        self.path = path
+        self.block_size = block_size
+        self.pending_ts = []
+        self.pending_values = []
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as fh:
+                fh.write(self.MAGIC)
+        else:
+            # Drop a block torn by a crash mid-write, so new blocks stay reachable
+            end = len(self.MAGIC)
+            for header, offset in self.blocks():
+                end = offset + header[-1]
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+        # Buffered readings are written out even if the archive is just dropped
+        self._finalizer = weakref.finalize(self, self._write_block, path, self.pending_ts, self.pending_values)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, ts: float, value: float):
+        self.pending_ts.append(round(ts * 1000))
+        self.pending_values.append(value)
+        if len(self.pending_ts) >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        self._write_block(self.path, self.pending_ts, self.pending_values)
+
+    def close(self):
+        self._finalizer()
+
+    @classmethod
+    def _write_block(cls, path, timestamps, values):
+        # Clears the buffers in place: the finalizer holds the same lists
+        if not timestamps:
+            return
+        payload = GorillaBlock.encode(timestamps, values)
+        header = cls.HEADER.pack(timestamps[0], min(timestamps), max(timestamps), len(timestamps),
+                                 min(values), max(values), len(payload))
+        with open(path, "ab") as fh:
+            fh.write(header + payload)
+        timestamps.clear()
+        values.clear()
+
+    def blocks(self):
+        # Yields (header tuple, offset of the payload) for each complete
+        # block; stops at a truncated header or payload
+        with open(self.path, "rb") as fh:
+            if fh.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{self.path} is not a temperature archive")
+            size = os.fstat(fh.fileno()).st_size
+            while True:
+                raw = fh.read(self.HEADER.size)
+                if len(raw) < self.HEADER.size:
+                    return
+                header = self.HEADER.unpack(raw)
+                if fh.tell() + header[-1] > size:
+                    return
+                yield header, fh.tell()
+                fh.seek(header[-1], os.SEEK_CUR)
+
+    def query(self, start: float, end: float):
+        # Streams (ts seconds, value) for start <= ts <= end, in append order
+        start_ms, end_ms = round(start * 1000), round(end * 1000)
+        with open(self.path, "rb") as fh:
+            for (first, earliest, latest, count, _, _, size), offset in self.blocks():
+                if latest < start_ms or earliest > end_ms:
+                    continue
+                fh.seek(offset)
+                for ts, value in GorillaBlock.decode(fh.read(size), first, count):
+                    if start_ms <= ts <= end_ms:
+                        yield ts / 1000, value
+        for ts, value in zip(self.pending_ts, self.pending_values):
+            if start_ms <= ts <= end_ms:
+                yield ts / 1000, value
+
+
+class ArchiveRecorder(Observer):
+    def __init__(self, archive: TemperatureArchive, clock=time.time):
+        self.archive = archive
+        self.clock = clock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, temp: float):
+        self.archive.append(self.clock(), temp)
+
+    def close(self):
+        self.archive.close()
+
+
+def benchmark_archive(days=1):
+    import tempfile
+
+    rng = random.Random(4)
+    path = os.path.join(tempfile.mkdtemp(), "thermostat.tarc")
+    archive = TemperatureArchive(path)
+    n = days * 24 * 3600
+    start_ts = 1_700_000_000.0
+    readings = []
+    temp = 21.0
+    for i in range(n):
+        # A 1 Hz sensor with 0.1°C resolution and occasional jitter in timing
+        temp = round(temp + rng.choice((-0.1, 0, 0, 0, 0.1)), 1)
+        ts = start_ts + i + (0.003 if rng.random() < 0.05 else 0.0)
+        readings.append((round(ts * 1000) / 1000, temp))
+        archive.append(ts, temp)
+    archive.close()
+
+    start = time.perf_counter()
+    decoded = list(archive.query(start_ts, start_ts + n))
+    decode = time.perf_counter() - start
+    assert decoded == readings
+
+    window = (start_ts + n / 2, start_ts + n / 2 + 600)
+    start = time.perf_counter()
+    ten_minutes = list(archive.query(*window))
+    ranged = time.perf_counter() - start
+    assert ten_minutes == [r for r in readings if window[0] <= r[0] <= window[1]]
+
+    size = os.path.getsize(path)
+    print(f"Archive: {n} readings in {size / 1024:.0f} KB ({size * 8 / n:.1f} bits/reading, "
+          f"{16 * n / size:.1f}x vs 16 B/point) | full decode {n / decode:,.0f} points/s | "
+          f"10 min range query {ranged * 1000:.1f} ms")
+    os.remove(path)
+
+
+def benchmark_ingest(stations=500, observers_per_station=10, batches=6, batch_size=100_000, capacity=1_000):
+    import sys
+    import tracemalloc
+
+    rng = random.Random(3)
+    station_ids = [f"ws-{i}" for i in range(stations)]
+    stream = [[(rng.choice(station_ids), float(b * batch_size + i), 20 + rng.random() * 5) for i in range(batch_size)]
+              for b in range(batches)]
+
+    pipeline = IngestPipeline(capacity)
+    thermostats = [SharedWindowThermostat(sid) for sid in station_ids for _ in range(observers_per_station)]
+    for t in thermostats:
+        pipeline.add_observer(t)
+    start = time.perf_counter()
+    for batch in stream:
+        pipeline.ingest(batch)
+    elapsed = time.perf_counter() - start
+    shared = sum(sys.getsizeof(s.timestamps) + sys.getsizeof(s.values) for s in pipeline.series.values())
+
+    # The same history kept per observer, as each Thermostat does today
+    tracemalloc.start()
+    per_observer = {sid: [deque(maxlen=capacity) for _ in range(observers_per_station)] for sid in station_ids}
+    for batch in stream:
+        for sid, ts, value in batch:
+            reading = (ts, value)
+            for history in per_observer[sid]:
+                history.append(reading)
+    duplicated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sid = station_ids[0]
+    _, values = pipeline.window(sid, 24)
+    assert list(values) == [v for _, v in list(per_observer[sid][0])[-24:]]
+    print(f"Ingest: {batches * batch_size / elapsed:,.0f} records/s into {stations} stations with "
+          f"{len(thermostats)} observers | history memory shared {shared / 1e6:.1f} MB vs "
+          f"per-observer {duplicated / 1e6:.1f} MB")
+
+
+def benchmark_async_fanout(readings=2_000, fast_observers=50):
+    class SlowDisplay(Observer):
+        # e.g. a display that writes to a network socket
+        def __init__(self):
+            self.seen = 0
+
+        def update(self, temp: float):
+            time.sleep(0.001)
+            self.seen += 1
+
+    class FastDisplay(Observer):
+        def __init__(self):
+            self.last = None
+
+        def update(self, temp: float):
+            self.last = temp
+
+    for label, station in (("sync", WeatherStation(verbose=False)), ("async", AsyncWeatherStation(verbose=False))):
+        slow = SlowDisplay()
+        fast = [FastDisplay() for _ in range(fast_observers)]
+        if label == "async":
+            station.add_observer(slow, maxsize=32, policy=BackpressurePolicy.DROP_OLDEST)
+            for f in fast:
+                station.add_observer(f, policy=BackpressurePolicy.COALESCE)
+        else:
+            for observer in [slow] + fast:
+                station.add_observer(observer)
+
+        start = time.perf_counter()
+        for i in range(readings):
+            station.set_temperature(float(i))
+        publish = (time.perf_counter() - start) / readings
+        if label == "async":
+            station.close()
+            dropped = station.mailboxes[id(slow)].dropped
+        else:
+            dropped = 0
+        assert all(f.last == readings - 1 for f in fast)
+        print(f"{label:>5}: {publish * 1e6:8.1f} us per set_temperature | slow observer saw {slow.seen}, dropped {dropped}")
+
+
+def benchmark_coalescing(seconds=60, rate_hz=50, max_latency=0.25):
+    class BatchDisplay(Observer):
+        def __init__(self):
+            self.batches = []
+
+        def update(self, temp: float):
+            pass
+
+        def update_batch(self, batch: ReadingBatch):
+            self.batches.append(batch)
+
+    class Counter(Observer):
+        def __init__(self):
+            self.calls = 0
+
+        def update(self, temp: float):
+            self.calls += 1
+
+    # Simulated clock so the run is deterministic
+    now = [0.0]
+    station = WeatherStation(verbose=False)
+    relay = CoalescingRelay(max_latency, clock=lambda: now[0], auto_flush=False)
+    station.add_observer(relay)
+    display = BatchDisplay()
+    plain = Counter()
+    relay.add_observer(display)
+    relay.add_observer(plain)
+
+    rng = random.Random(2)
+    readings = [20 + rng.random() * 5 for _ in range(seconds * rate_hz)]
+    for i, temp in enumerate(readings):
+        now[0] = i / rate_hz
+        station.set_temperature(temp)
+    relay.flush()
+
+    assert plain.calls == len(display.batches)
+    assert sum(b.count for b in display.batches) == len(readings)
+    assert math.isclose(sum(b.mean * b.count for b in display.batches) / len(readings), sum(readings) / len(readings))
+    assert min(b.min for b in display.batches) == min(readings) and display.batches[-1].latest == readings[-1]
+    print(f"{len(readings)} readings at {rate_hz} Hz -> {len(display.batches)} batch notifications "
+          f"({len(readings) / len(display.batches):.0f}x fewer callbacks); first: {display.batches[0]}")
+
+
+def benchmark_rolling_stats(window=100_000, readings=300_000):
+    rng = random.Random(0)
+    values = [rng.gauss(22, 3) for _ in range(readings)]
+
+    # Full window, as in steady state
+    history = deque(values[:window], maxlen=window)
+    start = time.perf_counter()
+    for v in values[window:window + 1_000]:
+        history.append(v)
+        sum(history) / len(history)
+    naive = (time.perf_counter() - start) / 1_000
+
+    stats = RollingStats(window)
+    start = time.perf_counter()
+    for v in values:
+        stats.add(v)
+        stats.mean, stats.min, stats.max, stats.variance
+    rolling = (time.perf_counter() - start) / readings
+
+    tail = values[-window:]
+    assert math.isclose(stats.mean, sum(tail) / window, rel_tol=1e-9)
+    assert stats.min == min(tail) and stats.max == max(tail)
+    print(f"\nWindow {window}: sum()/len() {naive * 1e6:.1f} us/reading | "
+          f"RollingStats {rolling * 1e6:.2f} us/reading")
+
+
+def benchmark_time_series(days=2):
+    # One reading per second for `days` days
+    store = TimeSeriesStore()
+    rng = random.Random(1)
+    start_ts = 1_700_000_000
+    n = days * 24 * 3600
+    start = time.perf_counter()
+    for i in range(n):
+        store.add(20 + rng.random() * 5, start_ts + i)
+    ingest = (time.perf_counter() - start) / n
+
+    slots = sum(t.capacity for t in store.tiers)
+    for label, seconds in (("5 min", 300), ("6 h", 6 * 3600), ("24 h", 24 * 3600)):
+        start = time.perf_counter()
+        count, mean, low, high = store.summary(seconds)
+        elapsed = time.perf_counter() - start
+        print(f"Last {label}: {count} readings, avg {mean:.2f} (tier {store.tier_for(store.latest - seconds).resolution}s) "
+              f"in {elapsed * 1000:.2f} ms")
+    print(f"Ingest {ingest * 1e6:.1f} us/reading; {slots} preallocated buckets "
+          f"(~{slots * 40 / 1024:.0f} KB) vs {n * 8 / 1024:.0f} KB of raw floats")
+
+
 # Test
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Weather station demo")
+    parser.add_argument("--benchmark", action="store_true", help="also run the timing benchmarks")
+    args = parser.parse_args()
+
     station = WeatherStation()
 
     t1 = Thermostat()
@@ -74,4 +1190,25 @@ if __name__ == "__main__":
     station.add_observer(t2)
 
     station.set_temperature(25.5)
-    station.set_temperature(30.2)
\ No newline at end of file
+    station.set_temperature(30.2)
+
+    # Observers are held weakly: keep a reference for as long as it should listen
+    t3 = RecordingThermostat()
+    station.add_observer(t3)
+    station.set_temperature(27.1)
+
+    # Only woken when the temperature moves by 2°C or crosses 30°C
+    t4 = Thermostat()
+    station.subscribe_min_delta(t4, 2.0)
+    station.subscribe_threshold(t4, 30.0)
+    for temp in (27.5, 28.0, 29.6, 30.4):
+        station.set_temperature(temp)
+
+    if args.benchmark:
+        benchmark_rolling_stats()
+        benchmark_time_series()
+        print()
+        benchmark_async_fanout()
+        benchmark_coalescing()
+        benchmark_ingest()
+        benchmark_archive()
\ No newline at end of file
@@ -19,12 +19,38 @@ This design supports both simplicity and maintainability.
 """
 
 from abc import ABC,abstractmethod
+from array import array
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from itertools import compress, repeat
+from time import perf_counter_ns
+import fnmatch
+import operator
+import random
+import re
+import time
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Atomic groups (?>...) only exist from Python 3.11
+ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
 
 class File:
-    def __init__(self, name,extension,size):
+    # No per-instance __dict__: catalogs may hold millions of files
+    __slots__ = ("name", "extension", "size", "directory")
+
+    def __init__(self, name,extension,size,directory="/"):
         self.name = name
         self.extension = extension
         self.size = size
+        self.directory = directory
+
+    @property
+    def full_name(self):
+        return f"{self.name}.{self.extension}" if self.extension else self.name
 
     def __repr__(self):
         return f"File(name={self.name}, extension={self.extension}, size={self.size})"
@@ -55,6 +81,75 @@ class SizeSpecification(Specification):
     def is_satisfied(self,file):
         return file.size == self.size
 
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def required_literal_runs(regex):
+    # Literal runs every match of regex must contain, read from the parsed
+    # pattern rather than its text so escapes and classes parse as re does.
+    # Runs break at anything that is not a plain literal; case-insensitive
+    # patterns or groups guarantee nothing.
+    try:
+        parsed = sre_parse.parse(regex)
+    except re.error:
+        return []
+    if parsed.state.flags & re.IGNORECASE:
+        return []
+    runs, run = [], []
+
+    def walk(items):
+        nonlocal run
+        for op, arg in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(arg))
+            elif op is sre_parse.SUBPATTERN and not arg[1] & re.IGNORECASE:
+                walk(arg[3])
+            elif op is ATOMIC_GROUP:
+                walk(arg)
+            else:
+                runs.append("".join(run))
+                run = []
+
+    walk(parsed)
+    runs.append("".join(run))
+    return runs
+
+# Pattern specifications match against the full file name ("report.pdf").
+# required_trigrams() lists trigrams every match must contain, which lets a
+# TrigramIndex narrow the candidates before is_satisfied runs.
+class SubstringNameSpecification(Specification):
+    def __init__(self, text: str):
+        self.text = text
+
+    def is_satisfied(self,file):
+        return self.text in file.full_name
+
+    def required_trigrams(self):
+        return trigrams(self.text)
+
+class GlobNameSpecification(Specification):
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._match = re.compile(fnmatch.translate(pattern)).match
+
+    def is_satisfied(self,file):
+        return self._match(file.full_name) is not None
+
+    def required_trigrams(self):
+        # Literal runs between *, ? and [...] wildcards, as fnmatch reads them
+        return set().union(*map(trigrams, required_literal_runs(fnmatch.translate(self.pattern))))
+
+class RegexNameSpecification(Specification):
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self._search = re.compile(pattern).search
+
+    def is_satisfied(self,file):
+        return self._search(file.full_name) is not None
+
+    def required_trigrams(self):
+        return set().union(*map(trigrams, required_literal_runs(self.pattern)))
+
 class AndSpecification(Specification):
     def __init__(self, *specs):
         self.specs = specs
@@ -69,14 +164,600 @@ class OrSpecification(Specification):
     def is_satisfied(self,file):
         return any(spec.is_satisfied(file) for spec in self.specs)
     
-class FileSearch:
+# AND/OR that reorder their children at runtime. Every sample_every-th call
+# evaluates all children, timing each and counting passes; the children are
+# then sorted so the cheapest, most decisive ones run first.
+class AdaptiveOrdering(ABC):
+    def __init__(self, *specs, sample_every=32):
+        self.specs = specs
+        self.sample_every = sample_every
+        self._calls = 0
+        # spec -> [samples, passes, total cost in ns]
+        self.stats = {spec: [0, 0, 0] for spec in specs}
+
+    def sample(self, file):
+        results = []
+        for spec in self.specs:
+            start = perf_counter_ns()
+            passed = spec.is_satisfied(file)
+            stat = self.stats[spec]
+            stat[2] += perf_counter_ns() - start
+            stat[0] += 1
+            stat[1] += bool(passed)
+            results.append(passed)
+        self.specs = tuple(sorted(self.specs, key=self.rank))
+        return results
+
+    def rank(self, spec):
+        samples, passes, cost = self.stats[spec]
+        pass_rate = (passes + 1) / (samples + 2)
+        return self.expected_cost(cost / max(samples, 1), pass_rate)
+
+    @abstractmethod
+    def expected_cost(self, cost, pass_rate):
+        pass
+
+class AdaptiveAndSpecification(AdaptiveOrdering, AndSpecification):
+    def expected_cost(self, cost, pass_rate):
+        # Cost per file rejected
+        return cost / (1 - pass_rate)
+
+    def is_satisfied(self,file):
+        self._calls += 1
+        if self._calls % self.sample_every == 0:
+            return all(self.sample(file))
+        for spec in self.specs:
+            if not spec.is_satisfied(file):
+                return False
+        return True
+
+class AdaptiveOrSpecification(AdaptiveOrdering, OrSpecification):
+    def expected_cost(self, cost, pass_rate):
+        # Cost per file accepted
+        return cost / pass_rate
+
+    def is_satisfied(self,file):
+        self._calls += 1
+        if self._calls % self.sample_every == 0:
+            return any(self.sample(file))
+        for spec in self.specs:
+            if spec.is_satisfied(file):
+                return True
+        return False
+
+# Fuses a specification tree into one generated predicate function
+class SpecificationCompiler:
+    def compile(self, spec: Specification):
+        namespace = {}
+        exec(f"def fused(file):\n    return {self._term(spec, namespace)}", namespace)
+        return namespace["fused"]
+
+    def _term(self, spec, namespace):
+        # Exact type checks: subclasses may override is_satisfied()
+        if type(spec) is NameSpecification:
+            return f"file.name == {self._constant(spec.name, namespace)}"
+        if type(spec) is ExtensionSpecification:
+            return f"file.extension == {self._constant(spec.extension, namespace)}"
+        if type(spec) is SizeSpecification:
+            return f"file.size == {self._constant(spec.size, namespace)}"
+        if type(spec) in (AndSpecification, OrSpecification):
+            if not spec.specs:
+                return "True" if type(spec) is AndSpecification else "False"
+            joiner = " and " if type(spec) is AndSpecification else " or "
+            return "(" + joiner.join(self._term(s, namespace) for s in spec.specs) + ")"
+        return f"{self._constant(spec.is_satisfied, namespace)}(file)"
+
+    def _constant(self, value, namespace):
+        key = f"_c{len(namespace)}"
+        namespace[key] = value
+        return key
+
+# Inverted index from name trigrams to file positions
+class TrigramIndex:
     def __init__(self, files):
+        self.size = len(files)
+        self.postings = {}
+        for i, file in enumerate(files):
+            self.add(i, file)
+
+    def add(self, position, file):
+        for gram in trigrams(file.full_name):
+            self.postings.setdefault(gram, set()).add(position)
+
+    def candidates(self, spec: Specification):
+        # Positions that may satisfy spec, or None when every file might
+        if hasattr(spec, "required_trigrams"):
+            grams = spec.required_trigrams()
+            if not grams:
+                return None
+            postings = sorted((self.postings.get(g, set()) for g in grams), key=len)
+            return postings[0].intersection(*postings[1:])
+        if isinstance(spec, AndSpecification):
+            narrowed = [c for c in map(self.candidates, spec.specs) if c is not None]
+            if not narrowed:
+                return None
+            narrowed.sort(key=len)
+            return narrowed[0].intersection(*narrowed[1:])
+        if isinstance(spec, OrSpecification):
+            narrowed = list(map(self.candidates, spec.specs))
+            if not narrowed or None in narrowed:
+                return None
+            return set().union(*narrowed)
+        return None
+
+class FileSearch:
+    def __init__(self, files, index_names=False):
         self.files = files
+        self.index_names = index_names
+        self.name_index = TrigramIndex(files) if index_names else None
+
+    def filter(self, spec: Specification):
+        predicate = SpecificationCompiler().compile(spec)
+        if self.index_names and self.name_index is None:
+            self.name_index = TrigramIndex(self.files)
+        candidates = self.name_index.candidates(spec) if self.name_index else None
+        if candidates is None:
+            return [file for file in self.files if predicate(file)]
+        return [self.files[i] for i in sorted(candidates) if predicate(self.files[i])]
+
+    def add_file(self, file):
+        self.files.append(file)
+        if self.name_index:
+            self.name_index.add(len(self.files) - 1, file)
+
+    def remove_file(self, file):
+        self.files.remove(file)
+        # Positions after the removed file shift; rebuild the index lazily
+        self.name_index = None
+
+
+FULL_RANGE = (float("-inf"), float("inf"))
+
+def canonical_spec(spec: Specification):
+    # Hashable, order-independent form of a spec tree, or None if some part
+    # of it is not understood (such queries are never cached)
+    if type(spec) is NameSpecification:
+        return ("name", spec.name)
+    if type(spec) is ExtensionSpecification:
+        return ("extension", spec.extension)
+    if type(spec) is SizeSpecification:
+        return ("size", spec.size)
+    if type(spec) is SubstringNameSpecification:
+        return ("substring", spec.text)
+    if type(spec) is GlobNameSpecification:
+        return ("glob", spec.pattern)
+    if type(spec) is RegexNameSpecification:
+        return ("regex", spec.pattern)
+    if isinstance(spec, (AndSpecification, OrSpecification)):
+        kind = "and" if isinstance(spec, AndSpecification) else "or"
+        children = set()
+        for child in spec.specs:
+            key = canonical_spec(child)
+            if key is None:
+                return None
+            # Flatten nested AND-in-AND / OR-in-OR
+            children.update(key[1] if key[0] == kind else (key,))
+        if len(children) == 1:
+            return children.pop()
+        return (kind, tuple(sorted(children, key=repr)))
+    return None
+
+def spec_footprint(key):
+    # (extensions or None for any, (min size, max size)) a matching file must fall in
+    kind = key[0]
+    if kind == "extension":
+        return frozenset([key[1]]), FULL_RANGE
+    if kind == "size":
+        return None, (key[1], key[1])
+    if kind not in ("and", "or"):
+        return None, FULL_RANGE
+    if not key[1]:
+        # Empty AND matches every file, empty OR none
+        return (None, FULL_RANGE) if kind == "and" else (frozenset(), (FULL_RANGE[1], FULL_RANGE[0]))
+    footprints = [spec_footprint(child) for child in key[1]]
+    ranges = [r for _, r in footprints]
+    extension_sets = [e for e, _ in footprints]
+    if kind == "and":
+        known = [e for e in extension_sets if e is not None]
+        extensions = frozenset.intersection(*known) if known else None
+        return extensions, (max(r[0] for r in ranges), min(r[1] for r in ranges))
+    extensions = None if None in extension_sets else frozenset().union(*extension_sets)
+    return extensions, (min(r[0] for r in ranges), max(r[1] for r in ranges))
+
+
+# FileSearch with an LRU cache of results keyed by the canonical spec. A
+# mutation only drops cached queries the changed file could match: the
+# extension/size footprint finds candidates, the compiled predicate confirms.
+class CachedFileSearch(FileSearch):
+    def __init__(self, files, index_names=False, max_entries=256):
+        super().__init__(files, index_names)
+        self.max_entries = max_entries
+        self.cache = OrderedDict()  # key -> (predicate, footprint, result)
+        self.by_extension = {}      # extension -> keys restricted to it
+        self.any_extension = set()
+        self.hits = self.misses = 0
 
     def filter(self, spec: Specification):
-        return [file for file in self.files if spec.is_satisfied(file)]
+        key = canonical_spec(spec)
+        if key is None:
+            return super().filter(spec)
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return list(self.cache[key][2])
+
+        self.misses += 1
+        result = super().filter(spec)
+        footprint = spec_footprint(key)
+        self.cache[key] = (SpecificationCompiler().compile(spec), footprint, result)
+        extensions = footprint[0]
+        if extensions is None:
+            self.any_extension.add(key)
+        for extension in extensions or ():
+            self.by_extension.setdefault(extension, set()).add(key)
+        if len(self.cache) > self.max_entries:
+            self._evict(next(iter(self.cache)))
+        return list(result)
+
+    def _evict(self, key):
+        _, (extensions, _), _ = self.cache.pop(key)
+        self.any_extension.discard(key)
+        for extension in extensions or ():
+            self.by_extension[extension].discard(key)
+
+    def _invalidate(self, file):
+        for key in self.by_extension.get(file.extension, set()) | self.any_extension:
+            predicate, (_, (low, high)), _ = self.cache[key]
+            if low <= file.size <= high and predicate(file):
+                self._evict(key)
+
+    def add_file(self, file):
+        super().add_file(file)
+        self._invalidate(file)
+
+    def remove_file(self, file):
+        if isinstance(self.files, FileCatalog):
+            # Every cached view past the removed row now reads the next row
+            super().remove_file(file)
+            self.cache.clear()
+            self.by_extension.clear()
+            self.any_extension.clear()
+            return
+        super().remove_file(file)
+        self._invalidate(file)
     
+# Row selection over a ColumnarSnapshot, one byte (0/1) per file.
+# & | ~ run over the whole column at once as big-integer bit operations.
+class Mask:
+    def __init__(self, bits: bytes):
+        self.bits = bits
+
+    def _combine(self, other, op):
+        n = len(self.bits)
+        result = op(int.from_bytes(self.bits, "little"), int.from_bytes(other.bits, "little"))
+        return Mask(result.to_bytes(n, "little"))
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __invert__(self):
+        return self._combine(Mask(b"\x01" * len(self.bits)), operator.xor)
+
+    def count(self):
+        return self.bits.count(1)
+
+    def indices(self):
+        return list(compress(range(len(self.bits)), self.bits))
+
+
+# Column-per-attribute copy of the file catalog. Rows are stored sorted by
+# size, so a size comparison is a contiguous row range found by bisect.
+# Strings are dictionary encoded; columns with at most 256 distinct values
+# are single bytes and match through bytes.translate.
+class ColumnarSnapshot:
+    SIZE_OPERATORS = {">", "<", ">=", "<=", "==", "!="}
+
+    def __init__(self, files):
+        self.files = list(files)
+        sizes = [f.size for f in self.files]
+        self.row_ids = array("q", sorted(range(len(sizes)), key=sizes.__getitem__))
+        rows = [self.files[i] for i in self.row_ids]
+        self.sizes = array("q", sorted(sizes))
+        self.extensions, self.extension_ids = self._encode([f.extension for f in rows])
+        self.names, self.name_ids = self._encode([f.name for f in rows])
+        self.directories, self.directory_ids = self._encode([f.directory for f in rows])
+
+    @staticmethod
+    def _encode(values):
+        dictionary = {v: i for i, v in enumerate(dict.fromkeys(values))}
+        ids = list(map(dictionary.__getitem__, values))
+        if len(dictionary) <= 256:
+            return dictionary, bytes(ids)
+        return dictionary, array("I", ids)
+
+    def __len__(self):
+        return len(self.files)
+
+    def _id_mask(self, dictionary, ids, value):
+        if value not in dictionary:
+            return Mask(bytes(len(ids)))
+        if isinstance(ids, bytes):
+            table = bytearray(256)
+            table[dictionary[value]] = 1
+            return Mask(ids.translate(table))
+        return Mask(bytes(map(dictionary[value].__eq__, ids)))
+
+    def _range_mask(self, start, stop):
+        return Mask(bytes(start) + b"\x01" * (stop - start) + bytes(len(self) - stop))
+
+    def size_mask(self, op, value):
+        if op not in self.SIZE_OPERATORS:
+            raise ValueError(f"Unsupported size operator: {op}")
+        n = len(self)
+        if op == ">":
+            return self._range_mask(bisect_right(self.sizes, value), n)
+        if op == ">=":
+            return self._range_mask(bisect_left(self.sizes, value), n)
+        if op == "<":
+            return self._range_mask(0, bisect_left(self.sizes, value))
+        if op == "<=":
+            return self._range_mask(0, bisect_right(self.sizes, value))
+        equal = self._range_mask(bisect_left(self.sizes, value), bisect_right(self.sizes, value))
+        return equal if op == "==" else ~equal
+
+    def extension_mask(self, extension):
+        return self._id_mask(self.extensions, self.extension_ids, extension)
+
+    def name_mask(self, name):
+        return self._id_mask(self.names, self.name_ids, name)
+
+    def directory_mask(self, directory):
+        return self._id_mask(self.directories, self.directory_ids, directory)
+
+    def evaluate(self, spec: Specification) -> Mask:
+        if type(spec) is NameSpecification:
+            return self.name_mask(spec.name)
+        if type(spec) is ExtensionSpecification:
+            return self.extension_mask(spec.extension)
+        if type(spec) is SizeSpecification:
+            return self.size_mask("==", spec.size)
+        if isinstance(spec, AndSpecification):
+            mask = Mask(b"\x01" * len(self))
+            for child in spec.specs:
+                mask = mask & self.evaluate(child)
+            return mask
+        if isinstance(spec, OrSpecification):
+            mask = Mask(bytes(len(self)))
+            for child in spec.specs:
+                mask = mask | self.evaluate(child)
+            return mask
+        # Unknown specification: fall back to per-object evaluation
+        rows = (self.files[i] for i in self.row_ids)
+        return Mask(bytes(map(spec.is_satisfied, rows)))
+
+    def select(self, mask: Mask):
+        # Back to catalog order
+        return [self.files[i] for i in sorted(compress(self.row_ids, mask.bits))]
+
+    def filter(self, spec: Specification):
+        return self.select(self.evaluate(spec))
+
+
+# Struct-of-arrays file catalog: one array per attribute and a shared string
+# table, about 20 bytes per file plus each distinct string once. Indexing or
+# iterating yields FileView objects, which specifications use like File.
+# A view is only (catalog, row): remove() shifts every later row down, so
+# views taken before a removal are invalid afterwards. Keep view.to_file()
+# copies of anything that must outlive a removal.
+class FileCatalog:
+    def __init__(self, files=()):
+        self.sizes = array("q")
+        self.name_ids = array("I")
+        self.extension_ids = array("I")
+        self.directory_ids = array("I")
+        self.strings = []
+        self._string_ids = {}
+        for file in files:
+            self.append(file)
+
+    def _intern(self, text):
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def append(self, file):
+        self.sizes.append(file.size)
+        self.name_ids.append(self._intern(file.name))
+        self.extension_ids.append(self._intern(file.extension))
+        self.directory_ids.append(self._intern(file.directory))
+
+    def remove(self, file):
+        ids = [self._string_ids.get(text) for text in (file.name, file.extension, file.directory)]
+        if None not in ids:
+            name_id, extension_id, directory_id = ids
+            for row, size in enumerate(self.sizes):
+                if size == file.size and self.name_ids[row] == name_id and \
+                        self.extension_ids[row] == extension_id and self.directory_ids[row] == directory_id:
+                    for column in (self.sizes, self.name_ids, self.extension_ids, self.directory_ids):
+                        del column[row]
+                    return
+        raise ValueError("FileCatalog.remove(file): file not in catalog")
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("FileCatalog index out of range")
+        return FileView(self, row)
+
+    def __iter__(self):
+        return map(FileView, repeat(self), range(len(self)))
+
+
+class FileView:
+    __slots__ = ("catalog", "row")
+
+    def __init__(self, catalog, row):
+        self.catalog = catalog
+        self.row = row
+
+    @property
+    def name(self):
+        return self.catalog.strings[self.catalog.name_ids[self.row]]
+
+    @property
+    def extension(self):
+        return self.catalog.strings[self.catalog.extension_ids[self.row]]
+
+    @property
+    def size(self):
+        return self.catalog.sizes[self.row]
+
+    @property
+    def directory(self):
+        return self.catalog.strings[self.catalog.directory_ids[self.row]]
+
+    full_name = File.full_name
+
+    def to_file(self):
+        return File(self.name, self.extension, self.size, self.directory)
+
+    def __eq__(self, other):
+        return isinstance(other, FileView) and self.catalog is other.catalog and self.row == other.row
+
+    def __hash__(self):
+        return hash((id(self.catalog), self.row))
+
+    def __repr__(self):
+        return f"File(name={self.name}, extension={self.extension}, size={self.size})"
+
+
+def generate_files(n_files, seed=42):
+    rng = random.Random(seed)
+    extensions = ["txt", "pdf", "py", "log", "csv", "jpg"]
+    return [File(f"file{rng.randrange(n_files // 10 + 1)}", rng.choice(extensions),
+                 rng.randint(0, 1000), f"/d{rng.randrange(100)}")
+            for _ in range(n_files)]
+
+
+def benchmark_columnar(n_files=500_000):
+    files = generate_files(n_files)
+    search = FileSearch(files)
+
+    start = time.perf_counter()
+    snapshot = ColumnarSnapshot(files)
+    build = time.perf_counter() - start
+
+    spec = AndSpecification(OrSpecification(ExtensionSpecification("txt"), ExtensionSpecification("log")),
+                            SizeSpecification(500))
+
+    start = time.perf_counter()
+    expected = search.filter(spec)
+    objects = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = snapshot.filter(spec)
+    columnar = time.perf_counter() - start
+
+    assert result == expected
+    print(f"\nObject path: {objects * 1000:.1f} ms | Columnar: {columnar * 1000:.1f} ms "
+          f"({objects / columnar:.1f}x) | Snapshot build: {build * 1000:.1f} ms over {n_files} files")
+
+
+def benchmark_trigram(n_files=200_000):
+    rng = random.Random(1)
+    words = ["report", "invoice", "draft", "final", "notes", "summary", "backup", "photo"]
+    files = [File(f"{rng.choice(words)}_{rng.choice(words)}_{rng.randint(2000, 2030)}",
+                  rng.choice(["pdf", "txt", "docx"]), rng.randint(0, 1000)) for _ in range(n_files)]
+    scan = FileSearch(files)
+    start = time.perf_counter()
+    indexed = FileSearch(files, index_names=True)
+    build = time.perf_counter() - start
+
+    for spec in (GlobNameSpecification("*report*2024*.pdf"), SubstringNameSpecification("final_2017"),
+                 RegexNameSpecification(r"^backup_\w+_202[0-3]\.txt$")):
+        start = time.perf_counter()
+        expected = scan.filter(spec)
+        full = time.perf_counter() - start
+        start = time.perf_counter()
+        result = indexed.filter(spec)
+        narrowed = time.perf_counter() - start
+        assert result == expected
+        print(f"{type(spec).__name__}({spec.__dict__.get('pattern', getattr(spec, 'text', ''))!r}): "
+              f"scan {full * 1000:.1f} ms | trigram {narrowed * 1000:.1f} ms, {len(result)} hits")
+    print(f"Trigram index build: {build * 1000:.0f} ms over {n_files} files")
+
+
+def benchmark_adaptive(n_files=200_000):
+    files = generate_files(n_files)
+    search = FileSearch(files)
+    # Written in the worst order: expensive, unselective predicates first
+    workload = [
+        (RegexNameSpecification(r"file\d+"), SizeSpecification(7), ExtensionSpecification("txt")),
+        (GlobNameSpecification("*1*"), ExtensionSpecification("pdf"), SizeSpecification(3)),
+    ]
+    static_total = adaptive_total = 0.0
+    for specs in workload:
+        for wrapper, adaptive in ((AndSpecification, False), (AdaptiveAndSpecification, True)):
+            spec = wrapper(*specs)
+            start = time.perf_counter()
+            result = search.filter(spec)
+            elapsed = time.perf_counter() - start
+            if adaptive:
+                adaptive_total += elapsed
+                assert result == adaptive_result
+            else:
+                static_total += elapsed
+                adaptive_result = result
+    print(f"\nMixed AND workload: static order {static_total * 1000:.0f} ms | "
+          f"adaptive order {adaptive_total * 1000:.0f} ms ({static_total / adaptive_total:.1f}x)")
+
+
+def benchmark_catalog(n_files=200_000):
+    import tracemalloc
+
+    class DictFile:
+        # The original File layout, with a per-instance __dict__
+        def __init__(self, name, extension, size, directory="/"):
+            self.name = name
+            self.extension = extension
+            self.size = size
+            self.directory = directory
+
+    rows = [(f.name, f.extension, f.size, f.directory) for f in generate_files(n_files)]
+    layouts = {
+        "dict objects": lambda: [DictFile(*row) for row in rows],
+        "slotted objects": lambda: [File(*row) for row in rows],
+        "struct-of-arrays": lambda: FileCatalog(File(*row) for row in rows),
+    }
+    spec = AndSpecification(ExtensionSpecification("log"), SizeSpecification(500))
+    print()
+    for label, build in layouts.items():
+        tracemalloc.start()
+        files = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        hits = len(FileSearch(files).filter(spec))
+        scan = time.perf_counter() - start
+        print(f"{label:<17} {size / n_files:6.0f} bytes/file (strings not counted) | scan {scan * 1000:.0f} ms, {hits} hits")
+
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Unix file search demo")
+    parser.add_argument("--benchmark", action="store_true", help="also run the timing benchmarks")
+    args = parser.parse_args()
+
     # Sample files
     files = [
         File("report", "pdf", 200),
@@ -111,3 +792,40 @@ if __name__ == "__main__":
     combined_or = OrSpecification(notes_spec, ppt_spec)
     or_result = search.filter(combined_or)
     print("\nFiles named 'notes' OR extension='ppt':", or_result)
+
+    # Columnar snapshot: vectorized masks combined with & and |
+    snapshot = ColumnarSnapshot(files)
+    mask = (snapshot.extension_mask("txt") | snapshot.extension_mask("csv")) & snapshot.size_mask(">=", 150)
+    print("\ntxt/csv files of size >= 150:", snapshot.select(mask))
+
+    # Pattern searches narrowed by the trigram index
+    indexed = FileSearch(files, index_names=True)
+    print("\nName contains 'ote':", indexed.filter(SubstringNameSpecification("ote")))
+    print("Glob '*e*t.t?t':", indexed.filter(GlobNameSpecification("*e*t.t?t")))
+    print("Regex 'pres.*\\.ppt$':", indexed.filter(RegexNameSpecification(r"pres.*\.ppt$")))
+
+    # Cached search: equivalent specs share one entry, mutations invalidate selectively
+    cached = CachedFileSearch(list(files))
+    cached.filter(AndSpecification(ExtensionSpecification("txt"), SizeSpecification(150)))
+    cached.filter(AndSpecification(SizeSpecification(150), ExtensionSpecification("txt"), ExtensionSpecification("txt")))
+    cached.filter(ExtensionSpecification("pdf"))
+    cached.add_file(File("todo", "txt", 150))
+    cached.filter(ExtensionSpecification("pdf"))
+    print(f"\nCache: {cached.hits} hits, {cached.misses} misses, {len(cached.cache)} entries; "
+          f"txt/150 after insert: {cached.filter(AndSpecification(ExtensionSpecification('txt'), SizeSpecification(150)))}")
+
+    # A catalog removal shifts later rows: earlier views are stale, copies are not
+    catalog = FileCatalog(files)
+    cached = CachedFileSearch(catalog)
+    kept = [view.to_file() for view in cached.filter(ExtensionSpecification("txt"))]
+    cached.filter(ExtensionSpecification("csv"))
+    cached.remove_file(catalog[0])
+    print("\nTXT files after removing report.pdf:", cached.filter(ExtensionSpecification("txt")))
+    print("CSV files after removing report.pdf:", cached.filter(ExtensionSpecification("csv")))
+    print("Copies kept from before the removal:", kept)
+
+    if args.benchmark:
+        benchmark_columnar()
+        benchmark_trigram()
+        benchmark_adaptive()
+        benchmark_catalog()